@@ -3,8 +3,16 @@
 import asyncio
 import logging
 from datetime import timedelta
+from functools import partial
+from types import MappingProxyType
 
+import voluptuous as vol
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .const import (
@@ -14,13 +22,21 @@ from .const import (
     DEFAULT_PORT_RETRIES,
     SETUP_DELAY_SECONDS,
     DEFAULT_CACHE_REBOOT,
+    DEFAULT_MAX_CONCURRENT_ECUS,
+    INVERTER_SWITCH_WINDOW,
+    MAX_POWER_WINDOW,
+    MAX_POWER_MAX_DELAY,
 )
-from .ecu_api import APsystemsSocket, APsystemsInvalidData
+from .ecu_api import APsystemsSocket, APsystemsInvalidData, ECU_BUDGET
+from .ecu_scheduler import phase_aligned_delay, idle_backoff_delay
+from .ecu_recorder import FrameRecorder
+from .ecu_inverters import changed_keys
+from .ecu_writes import WriteQueue
 from .gui_helpers import (
-    set_inverter_state,
+    set_inverter_states,
     set_zero_export,
     reboot_ecu,
-    set_inverter_max_power,
+    set_inverter_max_powers,
     pers_gui_notification,
 )
 
@@ -28,6 +44,17 @@ _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["sensor", "binary_sensor", "switch", "number", "button"]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+SERVICE_SET_INVERTER_STATES = "set_inverter_states"
+SET_INVERTER_STATES_SCHEMA = vol.Schema(
+    {
+        vol.Required("ecu_id"): cv.string,
+        vol.Optional("inverters", default=[]): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required("state"): cv.boolean,
+    }
+)
+
 
 class ECUREADER:
     """ECU Reader"""
@@ -43,44 +70,117 @@ class ECUREADER:
         self.ecu = APsystemsSocket(ipaddr)
         self.data_from_cache = False
         self.data_from_cache_count = 0
-        self.cached_data = {}
+        # last snapshot received from the ECU, replaced as a whole
+        self.cached_data = MappingProxyType({})
         self.query_enabled = True
+        # consecutive cycles without any inverter online
+        self.idle_cycles = 0
+        # imports the ECU-C meter graph into long-term statistics, opt-in
+        self.statistics = None
+        # snapshot returned by the last update and the keys that changed, None = all
+        self.snapshot = MappingProxyType({})
+        self.changed = None
+        # inverter switches toggled at about the same time share one request
+        self.switch_queue = WriteQueue(self.set_inverter_states, INVERTER_SWITCH_WINDOW)
+        # callbacks of the inverter switches by UID, told about new states
+        self.inverter_state_listeners = {}
+        # max power changes are debounced per inverter and sent as a batch
+        self.max_power_queue = WriteQueue(
+            self.set_inverter_max_powers, MAX_POWER_WINDOW, MAX_POWER_MAX_DELAY
+        )
 
     # called from number.py
     async def set_inverter_max_power(self, inverter_uid, max_panel_power):
-        """Set the max power for an inverter."""
-        return await set_inverter_max_power(self.ipaddr, inverter_uid, max_panel_power)
+        """
+        Set the max power for an inverter, debounced and batched with the
+        changes of other inverters. Returns whether the ECU accepted it, None
+        when a later change of the same inverter replaced it.
+        """
+        return await self.max_power_queue.submit(inverter_uid, max_panel_power)
+
+    async def set_inverter_max_powers(self, max_powers):
+        """Set the max power of several inverters, the result by UID."""
+        return await set_inverter_max_powers(
+            self.ecu.gui_session(), self.ipaddr, max_powers
+        )
 
     # called from switch.py
     async def set_inverter_state(self, inverter_id, state) -> bool:
-        """Set the on/off state of an inverter. 1=on, 2=off"""
-        return await set_inverter_state(self.ipaddr, inverter_id, state)
+        """Set the on/off state of an inverter, batched with other switches."""
+        return await self.switch_queue.submit(inverter_id, state)
+
+    async def set_inverter_states(self, states) -> bool:
+        """Set the on/off state of several inverters in one request."""
+        result = await set_inverter_states(self.ecu.gui_session(), self.ipaddr, states)
+        if result:
+            for inverter_id, state in states.items():
+                listener = self.inverter_state_listeners.get(inverter_id)
+                if listener:
+                    listener(state)
+        return result
 
     async def set_zero_export(self, state, power_limit):
         """Set the bridge state for zero export. 0=closed, 1=open"""
-        return await set_zero_export(self.ipaddr, state, power_limit)
+        return await set_zero_export(
+            self.ecu.gui_session(), self.ipaddr, state, power_limit
+        )
 
     # called from number.py
     async def set_power_limit(self, power_limit):
         """Set the power limit for zero export"""
-        return await set_zero_export(self.ipaddr, 1, power_limit)
+        return await set_zero_export(
+            self.ecu.gui_session(), self.ipaddr, 1, power_limit
+        )
 
     # called from button.py
     async def reboot_ecu(self):
         """Reboot the ECU (ECU-ID 2162... and ECU-C compatible)"""
         return await reboot_ecu(
-            self.ipaddr, self.wifi_ssid, self.wifi_password, self.cached_data
+            self.ecu.gui_session(),
+            self.ipaddr,
+            self.wifi_ssid,
+            self.wifi_password,
+            self.cached_data,
         )
 
-    async def update(self, port_retries, cache_reboot, show_graphs):
+    def next_update_interval(
+        self, scan_interval, phase_aligned, idle_max_interval=0, sun_up=False
+    ):
+        """Return the delay until the next query of the ECU."""
+        # Back off while all inverters are offline, unless the sun is up
+        if idle_max_interval and self.idle_cycles and not sun_up:
+            delay = idle_backoff_delay(
+                scan_interval, self.idle_cycles, idle_max_interval
+            )
+            _LOGGER.debug(
+                "ECU %s idle for %s cycles, next query in %ss",
+                self.ipaddr,
+                self.idle_cycles,
+                delay,
+            )
+            return timedelta(seconds=delay)
+        if phase_aligned and not self.data_from_cache:
+            delay = phase_aligned_delay(
+                self.ecu.refresh_cycle, self.ecu.time_zone, scan_interval
+            )
+            if delay is not None:
+                _LOGGER.debug(
+                    "ECU %s next query aligned to ECU refresh in %ss",
+                    self.ipaddr,
+                    round(delay),
+                )
+                return timedelta(seconds=delay)
+        return timedelta(seconds=scan_interval)
+
+    async def update(
+        self, port_retries, cache_reboot, show_graphs, differential=False, deadline=0
+    ):
         """Fetch ECU data or use cached data if querying failed."""
         # If querying is disabled, return cached data
         if not self.query_enabled:
             self.data_from_cache = True
-            self.cached_data["data_from_cache"] = self.data_from_cache
-            self.cached_data["data_from_cache_count"] = self.data_from_cache_count
             _LOGGER.debug("ECU querying disabled, returning cached data")
-            return self.cached_data
+            return self.publish(self.snapshot)
 
         self.data_from_cache = True
         self.data_from_cache_count += 1
@@ -102,23 +202,87 @@ class ECUREADER:
             )
         else:
             try:
-                data = await self.ecu.get_update(port_retries, show_graphs)
+                data = await self.ecu.get_update(
+                    port_retries, show_graphs, differential, deadline
+                )
+                if self.ecu.recorder:
+                    await self.ecu.recorder.flush()
                 if data.get("ecu_id"):
                     self.cached_data = data
                     self.data_from_cache = False
                     self.data_from_cache_count = 0
+                    # Idle until the base query reports production again
+                    if data.get("qty_of_online_inverters") or data.get("current_power"):
+                        self.idle_cycles = 0
+                    else:
+                        self.idle_cycles += 1
             # collector of APsystemsInvalidData exceptions
             except APsystemsInvalidData as err:
                 _LOGGER.warning(
                     "Using cached data for ECU %s: %s", self.ecu.ecu_id, err
                 )
 
-        # Set cache sensors
-        self.cached_data["data_from_cache"] = self.data_from_cache
-        self.cached_data["data_from_cache_count"] = self.data_from_cache_count
-
-        _LOGGER.debug("ECU %s returned data: %s", self.ipaddr, self.cached_data)
-        return self.cached_data
+        # Set cache sensors, timings include failed attempts so they are
+        # refreshed on cached cycles
+        data = self.publish(
+            self.cached_data,
+            deadline_phase=self.ecu.deadline_phase or "none",
+            latency={
+                phase: stats.summary() for phase, stats in self.ecu.latency.items()
+            },
+        )
+        _LOGGER.debug("ECU %s returned data: %s", self.ipaddr, data)
+        return data
+
+    def publish(self, data, **values):
+        """
+        Return a new snapshot of data with the cache sensors and values added.
+        The snapshot it was derived from is left untouched, falling back to
+        the cache only swaps which snapshot is used. The keys that changed
+        are remembered so only those entities are updated.
+        """
+        snapshot = MappingProxyType(
+            {
+                **data,
+                "data_from_cache": self.data_from_cache,
+                "data_from_cache_count": self.data_from_cache_count,
+                **values,
+            }
+        )
+        self.changed = changed_keys(self.snapshot, snapshot) if self.snapshot else None
+        self.snapshot = snapshot
+        return snapshot
+
+
+class ECUDataUpdateCoordinator(DataUpdateCoordinator):
+    """
+    Coordinator that only notifies the entities whose data changed.
+    Entities subscribe with the key of the value they show as context, see
+    changed_keys(), or with a frozenset of keys to follow several values.
+    Entities without context and all entities on the first update or a
+    change of availability are always notified.
+    """
+
+    def __init__(self, hass, ecu, **kwargs):
+        super().__init__(hass, _LOGGER, **kwargs)
+        self.ecu = ecu
+        self.notified_success = None
+
+    @callback
+    def async_update_listeners(self):
+        """Update the listeners of changed values only."""
+        changed = self.ecu.changed
+        if changed is None or self.notified_success != self.last_update_success:
+            self.notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+        for update_callback, context in list(self._listeners.values()):
+            if (
+                context is None
+                or context in changed
+                or (isinstance(context, frozenset) and not context.isdisjoint(changed))
+            ):
+                update_callback()
 
 
 async def update_listener(hass, config):
@@ -129,9 +293,24 @@ async def update_listener(hass, config):
     new_interval = timedelta(seconds=config_dict["data"]["scan_interval"])
     coordinator = hass.data[DOMAIN][config.entry_id]["coordinator"]
     coordinator.update_interval = new_interval
+    # The concurrency budget is shared by all ECU hubs
+    await ECU_BUDGET.set_limit(
+        config_dict["data"].get("max_concurrent_ecus", DEFAULT_MAX_CONCURRENT_ECUS)
+    )
     await coordinator.async_refresh()
 
 
+async def async_setup(hass, config):
+    """Register the services, they are shared by all ECU hubs."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_INVERTER_STATES,
+        partial(async_set_inverter_states, hass),
+        schema=SET_INVERTER_STATES_SCHEMA,
+    )
+    return True
+
+
 async def async_setup_entry(hass, config):
     """Setup APsystems platform"""
     hass.data.setdefault(DOMAIN, {})
@@ -143,24 +322,71 @@ async def async_setup_entry(hass, config):
     interval = timedelta(
         seconds=config.data.get("scan_interval", DEFAULT_SCAN_INTERVAL)
     )
+    # The concurrency budget is shared by all ECU hubs
+    await ECU_BUDGET.set_limit(
+        config.data.get("max_concurrent_ecus", DEFAULT_MAX_CONCURRENT_ECUS)
+    )
     ecu = ECUREADER(
         config.data["ecu_host"],
         config.data.get("wifi_ssid", "ECU-local"),
         config.data.get("wifi_password", "default"),
         config.data.get("show_graphs", True),
     )
+    # Also runs when the setup fails after the web UI session was opened
+    config.async_on_unload(ecu.ecu.close_gui_session)
+    config.async_on_unload(ecu.switch_queue.cancel)
+    config.async_on_unload(ecu.max_power_queue.cancel)
 
     async def do_ecu_update():
         """Pass current port_retries value dynamically."""
-        return await ecu.update(
+        ecu.ecu.schedule.set_intervals(
+            config.data.get("inverter_interval", 0),
+            config.data.get("signal_interval", 0),
+            config.data.get("meter_interval", 0),
+        )
+        # Opt-in recording of the raw frames under <config>/apsystems_ecu_reader
+        if not config.data.get("record_frames", False):
+            ecu.ecu.recorder = None
+        elif ecu.ecu.recorder is None:
+            ecu.ecu.recorder = FrameRecorder(hass.config.path(DOMAIN))
+        # Opt-in import of the ECU-C meter graph history, needs the recorder
+        if not config.data.get("meter_statistics", False):
+            ecu.statistics = None
+        elif (
+            ecu.statistics is None
+            and "recorder" in hass.config.components
+            and (ecu.ecu.ecu_id or "").startswith("215")
+        ):
+            # Imported here, the recorder requirements are only needed opted-in
+            from .ecu_statistics import MeterStatisticsImporter
+
+            ecu.statistics = MeterStatisticsImporter(hass, ecu.ecu.ecu_id)
+            await ecu.statistics.async_load()
+        if ecu.statistics:
+            ecu.statistics.prepare(ecu.ecu.meter_graph, ecu.ecu.time_zone)
+        data = await ecu.update(
             config.data.get("port_retries", DEFAULT_PORT_RETRIES),
             config.data.get("cache_reboot", DEFAULT_CACHE_REBOOT),
             config.data.get("show_graphs", True),
+            config.data.get("differential_polling", False),
+            # Without an explicit deadline a cycle may take one scan interval
+            config.data.get("cycle_deadline", 0)
+            or config.data.get("scan_interval", DEFAULT_SCAN_INTERVAL),
+        )
+        if ecu.statistics:
+            await ecu.statistics.async_import(ecu.ecu.meter_graph, ecu.ecu.time_zone)
+        # Schedule the next query, optionally in phase with the ECU refresh
+        coordinator.update_interval = ecu.next_update_interval(
+            config.data.get("scan_interval", DEFAULT_SCAN_INTERVAL),
+            config.data.get("phase_aligned", False),
+            config.data.get("idle_max_interval", 0),
+            hass.states.is_state("sun.sun", "above_horizon"),
         )
+        return data
 
-    coordinator = DataUpdateCoordinator(
+    coordinator = ECUDataUpdateCoordinator(
         hass,
-        _LOGGER,
+        ecu,
         name=DOMAIN,
         update_method=do_ecu_update,
         update_interval=interval,
@@ -208,6 +434,17 @@ async def async_setup_entry(hass, config):
             model=inv_data.get("model"),
         )
 
+    @callback
+    def sun_state_changed(event):
+        """Leave idle mode as soon as the sun rises."""
+        new_state = event.data.get("new_state")
+        if ecu.idle_cycles and new_state and new_state.state == "above_horizon":
+            hass.async_create_task(coordinator.async_request_refresh())
+
+    config.async_on_unload(
+        async_track_state_change_event(hass, ["sun.sun"], sun_state_changed)
+    )
+
     # Forward all platforms at once
     await hass.config_entries.async_forward_entry_setups(config, PLATFORMS)
 
@@ -215,6 +452,36 @@ async def async_setup_entry(hass, config):
     return True
 
 
+async def async_set_inverter_states(hass, call):
+    """Switch several inverters of one ECU in a single request."""
+    ecu_id = call.data["ecu_id"]
+    ecu = next(
+        (
+            entry["ecu"]
+            for entry in hass.data.get(DOMAIN, {}).values()
+            if entry["ecu"].ecu.ecu_id == ecu_id
+        ),
+        None,
+    )
+    if ecu is None:
+        raise ServiceValidationError(f"No ECU with ID {ecu_id} is configured")
+    if not ecu_id.startswith(("215", "2162")):
+        raise ServiceValidationError(
+            f"ECU {ecu_id} does not support switching inverters, "
+            "only ECU-ID 2162... series and ECU-C models do"
+        )
+    inverters = call.data["inverters"] or list(ecu.snapshot.get("inverters", {}))
+    unknown = set(inverters) - set(ecu.snapshot.get("inverters", {}))
+    if unknown:
+        raise ServiceValidationError(
+            f"Unknown inverters for ECU {ecu_id}: {', '.join(sorted(unknown))}"
+        )
+    if not inverters:
+        return
+    if not await ecu.set_inverter_states(dict.fromkeys(inverters, call.data["state"])):
+        raise HomeAssistantError(f"ECU {ecu_id} did not accept the inverter states")
+
+
 async def async_remove_config_entry_device(hass, _, device_entry) -> bool:
     """Handle device removal"""
     if not device_entry:
@@ -7,6 +7,7 @@ from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN, CACHE_ICON
+from .ecu_inverters import data_context
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,7 +34,7 @@ class APsystemsECUBinarySensor(CoordinatorEntity, BinarySensorEntity):
     """Representation of a binary sensor for APsystems ECU."""
 
     def __init__(self, coordinator, ecu, field, label=None, icon=None):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=data_context(field))
         self.coordinator = coordinator
         self._ecu = ecu
         self._field = field
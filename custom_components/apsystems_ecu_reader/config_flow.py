@@ -18,6 +18,16 @@ CACHE_REBOOT = 3
 SHOW_GRAPHS = True
 WIFI_SSID = "ECU-WIFI_local"
 WIFI_PASSWORD = "default"
+MAX_CONCURRENT_ECUS = 2
+DIFFERENTIAL_POLLING = False
+INVERTER_INTERVAL = 0
+SIGNAL_INTERVAL = 0
+METER_INTERVAL = 0
+PHASE_ALIGNED = False
+IDLE_MAX_INTERVAL = 0
+CYCLE_DEADLINE = 0
+RECORD_FRAMES = False
+METER_STATISTICS = False
 
 
 @config_entries.HANDLERS.register(DOMAIN)
@@ -41,6 +51,28 @@ class FlowHandler(config_entries.ConfigFlow):
                 vol.Optional(KEYS[4], default=SHOW_GRAPHS): bool,
                 vol.Optional(KEYS[5], default=WIFI_SSID): str,
                 vol.Optional(KEYS[6], default=WIFI_PASSWORD): str,
+                vol.Optional(KEYS[7], default=MAX_CONCURRENT_ECUS): vol.All(
+                    int, vol.Range(min=1, max=10)
+                ),
+                vol.Optional(KEYS[8], default=DIFFERENTIAL_POLLING): bool,
+                vol.Optional(KEYS[9], default=INVERTER_INTERVAL): vol.All(
+                    int, vol.Range(min=0, max=7200)
+                ),
+                vol.Optional(KEYS[10], default=SIGNAL_INTERVAL): vol.All(
+                    int, vol.Range(min=0, max=7200)
+                ),
+                vol.Optional(KEYS[11], default=METER_INTERVAL): vol.All(
+                    int, vol.Range(min=0, max=7200)
+                ),
+                vol.Optional(KEYS[12], default=PHASE_ALIGNED): bool,
+                vol.Optional(KEYS[13], default=IDLE_MAX_INTERVAL): vol.All(
+                    int, vol.Range(min=0, max=7200)
+                ),
+                vol.Optional(KEYS[14], default=CYCLE_DEADLINE): vol.All(
+                    int, vol.Range(min=0, max=600)
+                ),
+                vol.Optional(KEYS[15], default=RECORD_FRAMES): bool,
+                vol.Optional(KEYS[16], default=METER_STATISTICS): bool,
             }
         )
 
@@ -93,6 +125,36 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Optional(KEYS[4], default=_config.get(KEYS[4], SHOW_GRAPHS)): bool,
                 vol.Optional(KEYS[5], default=_config.get(KEYS[5], WIFI_SSID)): str,
                 vol.Optional(KEYS[6], default=_config.get(KEYS[6], WIFI_PASSWORD)): str,
+                vol.Optional(
+                    KEYS[7], default=_config.get(KEYS[7], MAX_CONCURRENT_ECUS)
+                ): vol.All(int, vol.Range(min=1, max=10)),
+                vol.Optional(
+                    KEYS[8], default=_config.get(KEYS[8], DIFFERENTIAL_POLLING)
+                ): bool,
+                vol.Optional(
+                    KEYS[9], default=_config.get(KEYS[9], INVERTER_INTERVAL)
+                ): vol.All(int, vol.Range(min=0, max=7200)),
+                vol.Optional(
+                    KEYS[10], default=_config.get(KEYS[10], SIGNAL_INTERVAL)
+                ): vol.All(int, vol.Range(min=0, max=7200)),
+                vol.Optional(
+                    KEYS[11], default=_config.get(KEYS[11], METER_INTERVAL)
+                ): vol.All(int, vol.Range(min=0, max=7200)),
+                vol.Optional(
+                    KEYS[12], default=_config.get(KEYS[12], PHASE_ALIGNED)
+                ): bool,
+                vol.Optional(
+                    KEYS[13], default=_config.get(KEYS[13], IDLE_MAX_INTERVAL)
+                ): vol.All(int, vol.Range(min=0, max=7200)),
+                vol.Optional(
+                    KEYS[14], default=_config.get(KEYS[14], CYCLE_DEADLINE)
+                ): vol.All(int, vol.Range(min=0, max=600)),
+                vol.Optional(
+                    KEYS[15], default=_config.get(KEYS[15], RECORD_FRAMES)
+                ): bool,
+                vol.Optional(
+                    KEYS[16], default=_config.get(KEYS[16], METER_STATISTICS)
+                ): bool,
             }
         )
 
@@ -111,8 +173,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
 async def test_ecu_connection(input_data):
     """Test the connection to the ECU and return the ECU ID if successful."""
+    ecu = APsystemsSocket(input_data.get(KEYS[0]))
     try:
-        ecu = APsystemsSocket(input_data.get(KEYS[0]))
         retries = input_data.get(KEYS[2], 2)
         test_query = await ecu.get_update(retries, True)
         return test_query.get("ecu_id", None)
@@ -122,3 +184,7 @@ async def test_ecu_connection(input_data):
             "APsystems invalid data exception for ECU %s: %s", ecu.ecu_id, err
         )
         return None
+    finally:
+        # The ECU-C meter query opens a web UI session, this socket is temporary
+        await ecu.close_socket()
+        await ecu.close_gui_session()
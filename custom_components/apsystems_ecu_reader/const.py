@@ -13,6 +13,9 @@ ECU_REBOOT_ICON = "mdi:restart"
 FROM_GRID_ICON = "mdi:transmission-tower-export"
 CONSUMED_ICON = "mdi:transmission-tower"
 DOWNLOAD_ICON = "mdi:download"
+LOCK_WAIT_ICON = "mdi:timer-sand"
+DEADLINE_ICON = "mdi:timer-alert-outline"
+LATENCY_ICON = "mdi:timer-outline"
 
 
 # Config flow schema. These are also translated through json translations
@@ -24,6 +27,16 @@ KEYS = [
     "show_graphs",
     "wifi_ssid",
     "wifi_password",
+    "max_concurrent_ecus",
+    "differential_polling",
+    "inverter_interval",
+    "signal_interval",
+    "meter_interval",
+    "phase_aligned",
+    "idle_max_interval",
+    "cycle_deadline",
+    "record_frames",
+    "meter_statistics",
 ]
 
 # Model maps for ECU and inverter types
@@ -35,6 +48,12 @@ ECU_MODEL_MAP = {
     "2030": "ECU-3",
 }
 
+# ECU models that answer several queries on one connection, all others
+# (like the 2162 ECU-R-Pro) need a reconnect between the individual queries
+PERSISTENT_CONNECTION_MODELS = ("2160", "2163", "2030")
+# Consecutive failures on a reused connection before reconnecting per query
+REUSE_FAILURE_LIMIT = 3
+
 INVERTER_MODEL_MAP = {
     "10": "YC500 series",
     "40": "YC600 series",
@@ -44,9 +63,51 @@ INVERTER_MODEL_MAP = {
     "90": "QT2 series",
 }
 
+# The ECU refreshes its inverter data about every 5 minutes
+DEFAULT_ECU_REFRESH_PERIOD = 300
+
+# Listener context of entities that do not show ECU data, these are only
+# updated when the coordinator becomes available or unavailable
+AVAILABILITY_CONTEXT = "availability"
+# Data key of the last_data_update attribute, entities showing it also listen
+# to it, see data_context()
+ATTRIBUTE_CONTEXT = "last_update"
+
+# Timed phases of an update cycle and their sensor labels
+LATENCY_PHASES = {
+    "connect": "Connect Latency",
+    "first_byte": "First Byte Latency",
+    "read": "Read Latency",
+    "meter": "Meter Latency",
+    "parse_ecu": "ECU Parse Latency",
+    "parse_inverter": "Inverter Parse Latency",
+}
+# Number of samples kept per phase for the rolling statistics
+LATENCY_WINDOW = 100
+
+# Size of a raw frame recording before it is rotated, and rotations kept
+RECORDER_MAX_BYTES = 5 * 1024 * 1024
+RECORDER_BACKUPS = 3
+
 PORT = 8899
 DEFAULT_RECV_SIZE = 1024
+DEFAULT_CONNECT_TIMEOUT = 3
+METER_TIMEOUT = 15
+# Pooled connections to the web UI of one ECU and their idle keep-alive time
+GUI_CONNECTION_LIMIT = 2
+GUI_KEEPALIVE_TIMEOUT = 15
+# Inverter switches toggled within this many seconds share one request
+INVERTER_SWITCH_WINDOW = 0.5
+# Max power writes are sent once the sliders were left alone this many
+# seconds, but no later than the maximum delay after the first change
+MAX_POWER_WINDOW = 2
+MAX_POWER_MAX_DELAY = 10
+# Meter graph hours are imported once no sample can arrive for them anymore
+METER_STATISTICS_GRACE = 15 * 60
+METER_STATISTICS_STORAGE_VERSION = 1
+FRAME_HEADER_SIZE = 9
 SETUP_DELAY_SECONDS = 10
 DEFAULT_SCAN_INTERVAL = 300
 DEFAULT_PORT_RETRIES = 2
 DEFAULT_CACHE_REBOOT = 3
+DEFAULT_MAX_CONCURRENT_ECUS = 2
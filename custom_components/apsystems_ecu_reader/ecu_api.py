@@ -5,26 +5,152 @@
 import asyncio
 import logging
 import errno
+import time
+from types import MappingProxyType
 
 from .ecu_helpers import (
-    aps_datetimestamp,
+    APsystemsInvalidData,
+    FrameParser,
+    FrameView,
+    LazyHex,
+    INVERTER_LAYOUTS,
+    UNKNOWN_INVERTER_LAYOUT,
     aps_str,
-    aps_int_from_bytes,
-    aps_uid,
     validate_data,
 )
 
-from .const import INVERTER_MODEL_MAP, PORT, DEFAULT_RECV_SIZE
+from .const import (
+    INVERTER_MODEL_MAP,
+    PORT,
+    DEFAULT_RECV_SIZE,
+    DEFAULT_MAX_CONCURRENT_ECUS,
+    PERSISTENT_CONNECTION_MODELS,
+    REUSE_FAILURE_LIMIT,
+    DEFAULT_CONNECT_TIMEOUT,
+    METER_TIMEOUT,
+)
 
-from .gui_helpers import get_power_meter_graph_data
+from .gui_helpers import (
+    MeterGraphCache,
+    create_gui_session,
+    get_power_meter_graph_data,
+)
+from .ecu_scheduler import RefreshCycleTracker, QuerySchedule, async_time_zone
+from .ecu_metrics import latency_table
+from .ecu_recorder import read_recording
+from .ecu_inverters import InverterFleet, InverterRecord, FleetColumns
 
 _LOGGER = logging.getLogger(__name__)
 
-GLOBAL_ECU_LOCK = asyncio.Lock()
 
+class APsystemsDeadlineExceeded(APsystemsInvalidData):
+    """Exception for an update cycle that ran out of time."""
+
+    def __init__(self, phase):
+        super().__init__(f"cycle deadline exceeded during {phase}")
+        self.phase = phase
+
+
+class CycleDeadline:
+    """
+    Time budget shared by all phases of one update cycle.
+    Every connect, read and HTTP timeout is capped by the remaining budget
+    so a cycle can not overrun it, the current phase is kept for reporting.
+    """
+
+    def __init__(self, budget=0):
+        self.expires = time.monotonic() + budget if budget else None
+        self.phase = None
+
+    def enter(self, phase):
+        """Mark the start of a new phase of the cycle."""
+        self.phase = phase
+
+    def remaining(self):
+        """Return the remaining budget in seconds, None without a deadline."""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def timeout(self, limit):
+        """Return the timeout for a single step, capped by the remaining budget."""
+        remaining = self.remaining()
+        return limit if remaining is None else min(limit, remaining)
+
+    def expired(self):
+        """Return True when the budget is used up."""
+        return self.remaining() == 0
+
+    def check(self):
+        """Raise APsystemsDeadlineExceeded when the budget is used up."""
+        if self.expired():
+            raise APsystemsDeadlineExceeded(self.phase)
 
-class APsystemsInvalidData(Exception):
-    """Exception for invalid data from the APsystems ECU."""
+
+class ECUConcurrencyBudget:
+    """
+    Serialize queries per ECU host and limit how many ECUs are queried at once.
+    Independent ECUs are polled in parallel, a slow or dead ECU only holds
+    up its own host lock and one slot of the budget.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._host_locks = {}
+
+    async def set_limit(self, limit):
+        """Change the number of ECUs that may be queried at the same time."""
+        async with self._condition:
+            self.limit = max(1, limit)
+            # A raised limit lets waiting queries start right away
+            self._condition.notify_all()
+
+    def host_lock(self, host):
+        """Return the lock for a single ECU host."""
+        return self._host_locks.setdefault(host, asyncio.Lock())
+
+    async def acquire(self, host, timeout=None):
+        """
+        Take the host lock and one slot of the global budget, waiting at
+        most timeout seconds (None waits as long as it takes). Raises
+        APsystemsDeadlineExceeded for the phase "slot" when they are not
+        free in time.
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if expires is None else max(0.0, expires - time.monotonic())
+
+        lock = self.host_lock(host)
+        try:
+            await asyncio.wait_for(lock.acquire(), remaining())
+        except asyncio.TimeoutError:
+            raise APsystemsDeadlineExceeded("slot") from None
+        try:
+            async with self._condition:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.in_flight < self.limit),
+                    remaining(),
+                )
+                self.in_flight += 1
+        except asyncio.TimeoutError:
+            lock.release()
+            raise APsystemsDeadlineExceeded("slot") from None
+        except BaseException:
+            lock.release()
+            raise
+
+    async def release(self, host):
+        """Give back the slot and the host lock taken by acquire()."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+        self.host_lock(host).release()
+
+
+ECU_BUDGET = ECUConcurrencyBudget(DEFAULT_MAX_CONCURRENT_ECUS)
 
 
 class APsystemsSocket:
@@ -36,10 +162,18 @@ class APsystemsSocket:
 
         # how long to wait for response on socket commands
         self.timeout = timeout
-        # how big of a buffer to read at a time from the socket
+        # how long to wait for a connection to the ECU
+        self.connect_timeout = DEFAULT_CONNECT_TIMEOUT
+        # time budget of the running update cycle
+        self.deadline = CycleDeadline()
+        # phase in which the last cycle ran out of time, None if it did not
+        self.deadline_phase = None
+        # how big of a chunk to read at a time from the socket
         self.recv_size = DEFAULT_RECV_SIZE
-        # buffer used to store the latest socket read
+        # buffer used to store the latest complete frame
         self.read_buffer = b""
+        # splits the received bytes into frames, reset per connection
+        self.parser = FrameParser()
 
         self.ecu_cmd = "APS1100160001END\n"
         self.inverter_query_prefix = "APS1100280002"
@@ -54,26 +188,62 @@ class APsystemsSocket:
         self.today_energy = 0
         self.vsl = 0
         self.tsl = 0
-        self.inverters = {}
-        self.data = {}
+        self.inverters = InverterFleet()
+        # records of the last inverter query by their raw bytes, decoded with
+        # raw_records_graphs as show_graphs
+        self.raw_records = {}
+        self.raw_records_graphs = None
+        # columnar copy of the inverters for fleet aggregates
+        self.columns = FleetColumns()
+        # read-only snapshot of the last cycle, replaced as a whole
+        self.data = MappingProxyType({})
+        # last inverter query result, reused while the query is not due
+        self.inverter_output = {}
         self.meter_data = {}
+        # validator and newest samples of the meter graph
+        self.meter_graph = MeterGraphCache()
         self.ecu_id = None
         self.firmware = None
         self.timezone = None
+        # time zone of the ECU clock, resolved from timezone
+        self.time_zone = None
         self.reader = None
         self.writer = None
+        # pooled web UI session, see gui_session()
+        self.session = None
         self.last_update = None
-        self._lock = asyncio.Lock()
+        self.lock_wait_time = 0
+        # None until the ECU model is known, see connection_is_persistent()
+        self.persistent_connection = None
+        # consecutive queries that failed on a reused connection
+        self.reuse_failures = 0
+        # learns the ECU refresh cycle for differential polling
+        self.refresh_cycle = RefreshCycleTracker()
+        # cadences of the inverter, signal and meter queries
+        self.schedule = QuerySchedule()
+        # rolling timings of the update phases, sent_at marks the last query
+        self.latency = latency_table()
+        self.sent_at = None
+        # FrameRecorder capturing the raw frames of every cycle, None if off
+        self.recorder = None
 
     async def open_socket(self, port_retries, delay=2):
         """Open an asyncio stream to the ECU, with retries."""
         if hasattr(self, "writer") and self.writer is not None:
             await self.close_socket()
 
+        self.parser.reset()
+        with self.latency["connect"].measure():
+            await self.connect(port_retries, delay)
+
+    async def connect(self, port_retries, delay):
+        """Connect to the ECU, retrying up to port_retries times."""
         for attempt in range(1, port_retries + 1):
+            self.deadline.check()
             try:
-                self.reader, self.writer = await asyncio.open_connection(
-                    self.ipaddr, PORT
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.ipaddr, PORT),
+                    timeout=self.deadline.timeout(self.connect_timeout),
                 )
                 _LOGGER.debug(
                     "ECU %s connection established on attempt %s/%s",
@@ -82,6 +252,13 @@ class APsystemsSocket:
                     port_retries,
                 )
                 return
+            except asyncio.TimeoutError:
+                _LOGGER.debug(
+                    "ECU %s connection attempt %s/%s timed out",
+                    self.ipaddr,
+                    attempt,
+                    port_retries,
+                )
             except OSError as err:
                 if err.errno == errno.EADDRINUSE:
                     _LOGGER.warning(
@@ -98,23 +275,31 @@ class APsystemsSocket:
                         port_retries,
                         err,
                     )
-                await asyncio.sleep(delay)
+                await asyncio.sleep(self.deadline.timeout(delay))
             except Exception as err:
                 raise APsystemsInvalidData(str(err)) from err
+        self.deadline.check()
         raise APsystemsInvalidData(f"Failed to connect after {port_retries} attempts.")
 
     async def send_read_from_socket(self, cmd):
         """Send command to the ECU and read the response using asyncio streams."""
         try:
-            self.writer.write(cmd.encode("utf-8"))
-            await self.writer.drain()
-            # Read up to self.recv_size bytes
-            self.read_buffer = await asyncio.wait_for(
-                self.reader.read(self.recv_size), timeout=self.timeout
-            )
+            with self.latency["read"].measure():
+                self.sent_at = time.monotonic()
+                self.writer.write(cmd.encode("utf-8"))
+                await self.writer.drain()
+                # Read one complete frame, all segments share a single deadline
+                self.read_buffer = await asyncio.wait_for(
+                    self.read_frame(cmd[9:13].encode()),
+                    timeout=self.deadline.timeout(self.timeout),
+                )
             return self.read_buffer, None
+        except APsystemsInvalidData as err:
+            await self.close_socket()
+            return None, str(err)
         except (
             asyncio.TimeoutError,
+            asyncio.IncompleteReadError,
             ConnectionResetError,
             BrokenPipeError,
             asyncio.CancelledError,
@@ -123,6 +308,7 @@ class APsystemsSocket:
             await self.close_socket()
             messages = {
                 asyncio.TimeoutError: "timeout occurred while waiting for data",
+                asyncio.IncompleteReadError: "connection closed before frame was complete",
                 ConnectionResetError: "connection reset by peer",
                 BrokenPipeError: "connection closed by peer",
                 asyncio.CancelledError: "operation was cancelled",
@@ -130,6 +316,34 @@ class APsystemsSocket:
             }
             return None, messages.get(type(err), str(err))
 
+    async def read_frame(self, command):
+        """
+        Read the next frame answering command (b"0001", ...) from the stream.
+        Received chunks go through the frame parser, regardless of how many
+        TCP segments the ECU uses or whether one read holds the end of one
+        response and the start of the next. Frames of another command, a
+        late answer to an earlier query on a persistent connection, are
+        dropped.
+        """
+        first_byte = True
+        while True:
+            while self.parser.frames:
+                frame = self.parser.frames.popleft()
+                if frame[9:13] == command:
+                    return frame
+                _LOGGER.debug(
+                    "ECU %s dropped a stale frame: %s", self.ipaddr, LazyHex(frame)
+                )
+            chunk = await self.reader.read(self.recv_size)
+            if not chunk:
+                raise asyncio.IncompleteReadError(
+                    bytes(self.parser.buffer), self.parser.missing()
+                )
+            if first_byte:
+                self.latency["first_byte"].add(time.monotonic() - self.sent_at)
+                first_byte = False
+            self.parser.feed(chunk)
+
     async def close_socket(self):
         """Close the asyncio stream writer."""
         if hasattr(self, "writer") and self.writer is not None:
@@ -142,113 +356,308 @@ class APsystemsSocket:
             self.reader = None
             _LOGGER.debug("ECU %s connection resources released", self.ipaddr)
 
-    async def get_update(self, port_retries, show_graphs):
+    def gui_session(self):
+        """Return the web UI session of this ECU, created on first use."""
+        if self.session is None or self.session.closed:
+            self.session = create_gui_session()
+        return self.session
+
+    async def close_gui_session(self):
+        """Close the web UI session and its pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def connection_is_persistent(self):
+        """Return True when the ECU model tolerates several queries per connection."""
+        if self.persistent_connection is None and self.ecu_id:
+            self.persistent_connection = self.ecu_id.startswith(
+                PERSISTENT_CONNECTION_MODELS
+            )
+        return bool(self.persistent_connection)
+
+    async def query(self, cmd, port_retries, label):
+        """
+        Send a single query and return the response frame.
+        An already open stream is reused. When a query on a reused stream
+        fails, it is retried once on a fresh connection. After
+        REUSE_FAILURE_LIMIT consecutive failures this ECU falls back to
+        reconnect-per-query for good, a single dropped packet does not.
+        """
+        reused = self.writer is not None
+        self.deadline.enter(f"{label} connect")
+        if not reused:
+            await self.open_socket(port_retries)
+        self.deadline.enter(f"{label} read")
+        data, status = await self.send_read_from_socket(cmd)
+        if reused and (status or not data):
+            self.deadline.check()
+            self.reuse_failures += 1
+            if self.reuse_failures >= REUSE_FAILURE_LIMIT:
+                _LOGGER.info(
+                    "ECU %s failed %s times in a row on a reused connection (%s), "
+                    "falling back to a new connection per query",
+                    self.ipaddr,
+                    self.reuse_failures,
+                    status,
+                )
+                self.persistent_connection = False
+            else:
+                _LOGGER.debug(
+                    "ECU %s failed on a reused connection (%s), reconnecting",
+                    self.ipaddr,
+                    status,
+                )
+            self.deadline.enter(f"{label} connect")
+            await self.open_socket(port_retries)
+            self.deadline.enter(f"{label} read")
+            data, status = await self.send_read_from_socket(cmd)
+        elif reused:
+            self.reuse_failures = 0
+        if not self.connection_is_persistent():
+            await self.close_socket()
+
+        if status or not data:
+            self.deadline.check()
+            raise APsystemsInvalidData(f"Could not retrieve {label} - {status}")
+        return data
+
+    def inverter_data_due(self, differential):
+        """Return True when the inverter and signal queries should run."""
+        if not differential or not self.inverters:
+            return True
+        return self.refresh_cycle.is_due()
+
+    async def get_update(
+        self, port_retries, show_graphs, differential=False, deadline=0
+    ):
         """
         Query the ECU for data and return it.
         In contrast to ECU 2160 models, the 2162 models require an
-        open and close on the port between the individual  queries.
-        The best generic solution is to now do this for all models.
+        open and close on the port between the individual queries.
+        Models listed in PERSISTENT_CONNECTION_MODELS reuse one connection
+        for all queries of a cycle, all others reconnect per query.
+        The inverter, signal and meter queries run on their own schedule,
+        with differential polling the inverter query also waits until the
+        ECU is due to refresh its data. In between, the latest result of
+        each query is reused.
+        With a deadline (seconds) the whole cycle, including the wait for a
+        query slot, is kept within that budget. When it runs out after the
+        base query, the cycle stops early and returns partial data.
         """
-        async with GLOBAL_ECU_LOCK:  # <--- Only one hub at a time!
-            async with self._lock:
-                # ECU base query
-                await self.open_socket(port_retries)
+        self.deadline = CycleDeadline(deadline)
+        self.deadline_phase = None
+        wait_start = time.monotonic()
+        # Queued behind other ECUs, the wait is part of the cycle budget
+        try:
+            await ECU_BUDGET.acquire(self.ipaddr, self.deadline.remaining())
+        except APsystemsDeadlineExceeded as err:
+            self.deadline_phase = err.phase
+            self.lock_wait_time = round(time.monotonic() - wait_start, 3)
+            raise
+        try:
+            self.lock_wait_time = round(time.monotonic() - wait_start, 3)
+            _LOGGER.debug(
+                "ECU %s waited %ss for a query slot", self.ipaddr, self.lock_wait_time
+            )
+            try:
+                # ECU base query, without it there is nothing to return
                 try:
-                    self.ecu_raw_data, status = await self.send_read_from_socket(
-                        self.ecu_cmd
-                    )
-                finally:
-                    await self.close_socket()
-
-                if status or not self.ecu_raw_data:
-                    raise APsystemsInvalidData(
-                        f"Could not retrieve ECU base data - {status}"
+                    self.deadline.enter("slot")
+                    self.deadline.check()
+                    self.ecu_raw_data = await self.query(
+                        self.ecu_cmd, port_retries, "ECU base data"
                     )
+                except APsystemsDeadlineExceeded as err:
+                    self.deadline_phase = err.phase
+                    raise
                 _LOGGER.debug(
-                    "ECU %s raw basic data: %s", self.ipaddr, self.ecu_raw_data.hex()
+                    "ECU %s raw basic data: %s", self.ipaddr, LazyHex(self.ecu_raw_data)
                 )
 
                 # Extract ECU-ID needed for other queries and carry on
                 self.ecu_id = aps_str(self.ecu_raw_data, 13, 12)
 
-                # Inverter query
-                inverter_cmd = self.inverter_query_prefix + self.ecu_id + "END\n"
-                await self.open_socket(port_retries)
+                now = time.monotonic()
+                tiers = self.schedule.due(self.inverter_data_due(differential), now)
+                completed = set()
                 try:
-                    self.inverter_raw_data, status = await self.send_read_from_socket(
-                        inverter_cmd
+                    if "inverter" in tiers:
+                        await self.query_inverter_data(port_retries)
+                        self.schedule.mark_run("inverter", now)
+                        completed.add("inverter")
+                    if "signal" in tiers:
+                        await self.query_signal_data(port_retries)
+                        self.schedule.mark_run("signal", now)
+                        completed.add("signal")
+                except APsystemsDeadlineExceeded as err:
+                    self.deadline_phase = err.phase
+                    _LOGGER.warning(
+                        "ECU %s %s, returning partial data", self.ipaddr, err
                     )
-                finally:
-                    await self.close_socket()
-
-                if status or not self.inverter_raw_data:
-                    raise APsystemsInvalidData(
-                        f"Could not retrieve inverter data - {status}"
+                if "inverter" not in tiers:
+                    _LOGGER.debug(
+                        "ECU %s inverter query not due, reusing the previous snapshot",
+                        self.ipaddr,
                     )
-                _LOGGER.debug(
-                    "ECU %s raw inverter data: %s",
-                    self.ipaddr,
-                    self.inverter_raw_data.hex(),
-                )
-
-                # Signal query
-                signal_cmd = self.signal_query_prefix + self.ecu_id + "END\n"
-                await self.open_socket(port_retries)
+            finally:
+                # Never keep a connection open between update cycles
+                await self.close_socket()
+
+            # Add CT data to the dictionary for ECU-C models only
+            if (
+                "meter" in tiers
+                and self.deadline_phase is None
+                and self.ecu_id.startswith("215")
+            ):
                 try:
-                    self.signal_raw_data, status = await self.send_read_from_socket(
-                        signal_cmd
-                    )
-                finally:
-                    await self.close_socket()
-
-                if status or not self.signal_raw_data:
-                    raise APsystemsInvalidData(
-                        f"Could not retrieve signal data - {status}"
+                    await self.add_meter_data()
+                    self.schedule.mark_run("meter", now)
+                    completed.add("meter")
+                except APsystemsDeadlineExceeded as err:
+                    self.deadline_phase = err.phase
+                    _LOGGER.warning(
+                        "ECU %s %s, returning partial data", self.ipaddr, err
                     )
-                _LOGGER.debug(
-                    "ECU %s raw signal data: %s",
-                    self.ipaddr,
-                    self.signal_raw_data.hex(),
-                )
-
-                # Add CT data to the dictionary for ECU-C models only
-                if self.ecu_id.startswith("215"):
-                   await self.add_meter_data()
-                # Add ECU parameters to the dictionary
+            if self.recorder:
+                self.record_frames(completed)
+            # Add ECU parameters to the dictionary
+            with self.latency["parse_ecu"].measure():
                 self.process_ecu_data()
-                # Finally all went right so call finalize and return it
-                return self.finalize_data(show_graphs)
+            self.time_zone = await async_time_zone(self.timezone)
+            # Finally all went right so call finalize and return it
+            return self.finalize_data(show_graphs, bool(completed - {"meter"}))
+        finally:
+            await ECU_BUDGET.release(self.ipaddr)
+
+    def record_frames(self, completed):
+        """Queue the frames received in this cycle on the recorder."""
+        frames = {"ecu": self.ecu_raw_data}
+        if "inverter" in completed:
+            frames["inverter"] = self.inverter_raw_data
+        if "signal" in completed:
+            frames["signal"] = self.signal_raw_data
+        if "meter" in completed:
+            frames["meter"] = self.meter_data
+        self.recorder.add(self.ecu_id, frames)
+
+    def replay_frames(self, record, show_graphs=True):
+        """Process one recorded cycle as if it was just received."""
+        self.ecu_raw_data = bytes.fromhex(record["ecu"])
+        self.ecu_id = aps_str(self.ecu_raw_data, 13, 12)
+        if record.get("inverter"):
+            self.inverter_raw_data = bytes.fromhex(record["inverter"])
+        if record.get("signal"):
+            self.signal_raw_data = bytes.fromhex(record["signal"])
+        if record.get("meter"):
+            self.meter_data = record["meter"]
+        with self.latency["parse_ecu"].measure():
+            self.process_ecu_data()
+        return self.finalize_data(
+            show_graphs, bool(record.get("inverter") or record.get("signal"))
+        )
+
+    async def replay(self, paths, show_graphs=True, speed=0):
+        """
+        Feed recorded cycles through the parser and yield the data of each.
+        speed 1 keeps the recorded pace, 10 is ten times faster and 0 does
+        not wait at all. The recordings are read blocking, so this is meant
+        for offline use and not from within Home Assistant.
+        """
+        previous = None
+        for record in read_recording(paths):
+            if speed and previous is not None:
+                await asyncio.sleep(max(0, record["time"] - previous) / speed)
+            previous = record["time"]
+            yield self.replay_frames(record, show_graphs)
+
+    async def query_inverter_data(self, port_retries):
+        """Run the inverter query, the ECU-ID must be known."""
+        inverter_cmd = self.inverter_query_prefix + self.ecu_id + "END\n"
+        self.inverter_raw_data = await self.query(
+            inverter_cmd, port_retries, "inverter data"
+        )
+        _LOGGER.debug(
+            "ECU %s raw inverter data: %s",
+            self.ipaddr,
+            LazyHex(self.inverter_raw_data),
+        )
+
+    async def query_signal_data(self, port_retries):
+        """Run the signal query, the ECU-ID must be known."""
+        signal_cmd = self.signal_query_prefix + self.ecu_id + "END\n"
+        self.signal_raw_data = await self.query(signal_cmd, port_retries, "signal data")
+        _LOGGER.debug(
+            "ECU %s raw signal data: %s",
+            self.ipaddr,
+            LazyHex(self.signal_raw_data),
+        )
 
     async def add_meter_data(self):
         """Add the meter data to the dictionary."""
-        self.meter_data = await get_power_meter_graph_data(self.ipaddr)
-        if self.meter_data:
-            self.data.update(self.meter_data)
+        self.deadline.enter("meter data")
+        self.deadline.check()
+        with self.latency["meter"].measure():
+            meter_data = await get_power_meter_graph_data(
+                self.gui_session(),
+                self.ipaddr,
+                self.deadline.timeout(METER_TIMEOUT),
+                self.meter_graph,
+            )
+        if meter_data:
+            self.meter_data = meter_data
         else:
+            self.deadline.check()
             raise APsystemsInvalidData(
                 "an error occurred while querying meter, no meter data received"
             )
 
-    def finalize_data(self, show_graphs):
-        """Finalize the data and return it."""
+    def finalize_data(self, show_graphs, refresh_inverters=True):
+        """
+        Build the snapshot of this cycle and return it.
+        Every cycle gets a new read-only dict which replaces self.data as a
+        whole, so a snapshot handed out earlier never changes. Inverter
+        records that did not change are shared with the previous snapshot.
+        """
+        previous = self.data
         try:
-            self.data["ecu_id"] = self.ecu_id
-            self.data["last_update"] = self.last_update
-            self.data["current_power"] = self.current_power
-            self.data["qty_of_online_inverters"] = self.qty_of_online_inverters
+            # Inverters go first, the inverter query sets last_update
+            if refresh_inverters:
+                with self.latency["parse_inverter"].measure():
+                    inverter_output = self.process_inverter_data(show_graphs)
+                if inverter_output:
+                    self.inverter_output = inverter_output
+                self.refresh_cycle.observe(self.last_update)
+
+            data = {
+                **self.meter_data,
+                "ecu_id": self.ecu_id,
+                "last_update": self.last_update,
+                "current_power": self.current_power,
+                "qty_of_online_inverters": self.qty_of_online_inverters,
+                "lock_wait_time": self.lock_wait_time,
+                "partial_update": self.deadline_phase is not None,
+            }
 
             # apply filters for ECU firmware bug where sometimes values are zero unexpectedly
             if self.qty_of_inverters:
-                self.data["qty_of_inverters"] = self.qty_of_inverters
+                data["qty_of_inverters"] = self.qty_of_inverters
+            elif "qty_of_inverters" in previous:
+                data["qty_of_inverters"] = previous["qty_of_inverters"]
             if self.today_energy or (
                 self.today_energy == 0 and self.qty_of_online_inverters == 0
             ):
-                self.data["today_energy"] = self.today_energy
+                data["today_energy"] = self.today_energy
+            elif "today_energy" in previous:
+                data["today_energy"] = previous["today_energy"]
             if self.lifetime_energy:
-                self.data["lifetime_energy"] = self.lifetime_energy
+                data["lifetime_energy"] = self.lifetime_energy
+            elif "lifetime_energy" in previous:
+                data["lifetime_energy"] = previous["lifetime_energy"]
 
             # Add inverter and signal data to the dictionary
-            self.data.update(self.process_inverter_data(show_graphs))
+            data.update(self.inverter_output)
+            self.data = MappingProxyType(data)
             return self.data
         except (KeyError, TypeError, ValueError) as err:
             raise APsystemsInvalidData(f"error during finalization ({err})") from err
@@ -260,23 +669,24 @@ class APsystemsSocket:
             error = validate_data(data, "ECU Query")
             if error:
                 raise APsystemsInvalidData(error)
-
-            self.ecu_id = aps_str(data, 13, 12)
-            self.lifetime_energy = aps_int_from_bytes(data, 27, 4) / 10
-            self.current_power = aps_int_from_bytes(data, 31, 4)
-            self.today_energy = aps_int_from_bytes(data, 35, 4) / 100
-            if aps_str(data, 25, 2) == "01":
-                self.qty_of_inverters = aps_int_from_bytes(data, 46, 2)
-                self.qty_of_online_inverters = aps_int_from_bytes(data, 48, 2)
-                self.vsl = int(aps_str(data, 52, 3))
-                self.firmware = aps_str(data, 55, self.vsl)
-                self.tsl = int(aps_str(data, 55 + self.vsl, 3))
-                self.timezone = aps_str(data, 58 + self.vsl, self.tsl)
-            elif aps_str(data, 25, 2) == "02":
-                self.qty_of_inverters = aps_int_from_bytes(data, 39, 2)
-                self.qty_of_online_inverters = aps_int_from_bytes(data, 41, 2)
-                self.vsl = int(aps_str(data, 49, 3))
-                self.firmware = aps_str(data, 52, self.vsl)
+            frame = FrameView(data)
+
+            self.ecu_id = frame.string(13, 12)
+            self.lifetime_energy = frame.integer(27, 4) / 10
+            self.current_power = frame.integer(31, 4)
+            self.today_energy = frame.integer(35, 4) / 100
+            if frame.string(25, 2) == "01":
+                self.qty_of_inverters = frame.integer(46, 2)
+                self.qty_of_online_inverters = frame.integer(48, 2)
+                self.vsl = frame.digits(52, 3)
+                self.firmware = frame.string(55, self.vsl)
+                self.tsl = frame.digits(55 + self.vsl, 3)
+                self.timezone = frame.string(58 + self.vsl, self.tsl)
+            elif frame.string(25, 2) == "02":
+                self.qty_of_inverters = frame.integer(39, 2)
+                self.qty_of_online_inverters = frame.integer(41, 2)
+                self.vsl = frame.digits(49, 3)
+                self.firmware = frame.string(52, self.vsl)
 
     def process_signal_data(self, data=None):
         """interpret raw signal data and return it."""
@@ -286,13 +696,14 @@ class APsystemsSocket:
             error = validate_data(data, "Signal Query")
             if error:
                 raise APsystemsInvalidData(error)
+            frame = FrameView(data)
             if not self.qty_of_inverters:
                 return signal_data
             location = 15
             for _ in range(self.qty_of_inverters):
-                inverter_uid = aps_uid(data, location, 12)
+                inverter_uid = frame.uid(location)
                 location += 6
-                signal_strength = data[location]
+                signal_strength = frame.integer(location, 1)
                 location += 1
                 signal_strength = int(-100 + (signal_strength / 255) * 100)
                 signal_data[inverter_uid] = signal_strength
@@ -309,145 +720,65 @@ class APsystemsSocket:
             error = validate_data(data, "Inverter Query")
             if error:
                 raise APsystemsInvalidData(error)
-            istr = ""
+            frame = FrameView(data)
             cnt1 = 0
             cnt2 = 26
-            if aps_str(data, 14, 2) == "00":
-                timestamp = aps_datetimestamp(data, 19, 14)
-                inverter_qty = aps_int_from_bytes(data, 17, 2)
+            if frame.string(14, 2) == "00":
+                timestamp = frame.datetimestamp(19)
+                inverter_qty = frame.integer(17, 2)
                 self.last_update = timestamp
                 output["timestamp"] = timestamp
                 output["inverters"] = {}
                 signal = self.process_signal_data()
-                inverters = {}
+                previous = self.inverters.records
+                known = {}
+                if show_graphs == self.raw_records_graphs:
+                    known = self.raw_records
+                raw_records = {}
+                inverters = InverterFleet()
+                self.columns.clear(inverter_qty)
+                not_replaced = frame.string(15, 2) == "01"
 
                 while cnt1 < inverter_qty:
-                    inv = {}
-                    if aps_str(data, 15, 2) == "01":  # 01 = Not replaced inverter
-                        inverter_uid = aps_uid(data, cnt2)
-                        inv["uid"] = inverter_uid
-                        inv["online"] = bool(aps_int_from_bytes(data, cnt2 + 6, 1))
-                        istr = aps_str(data, cnt2 + 7, 2)  # inverter type
-
-                        # Should the signal graphs be updated?
-                        inv["signal"] = (
-                            None if not inv["online"] else signal.get(inverter_uid, 0)
+                    if not_replaced:  # 01 = Not replaced inverter
+                        # The type code selects the layout of the whole record
+                        layout = INVERTER_LAYOUTS.get(
+                            frame.string(cnt2 + 7, 2), UNKNOWN_INVERTER_LAYOUT
                         )
-
-                        # Distinguishes the different inverters from this point down
-                        if istr in [
-                            "01",  # YC600/DS3
-                            "04",  # DS3D-L/DS3-H
-                        ]:  # 2-channel inverters
-                            power = []
-                            voltages = []
-
-                            # Should graphs be updated?
-                            if inv["online"]:
-                                inv["temperature"] = (
-                                    aps_int_from_bytes(data, cnt2 + 11, 2) - 100
-                                )
-
-                            if not inv["online"] and not show_graphs:
-                                inv["frequency"] = None
-                                power.extend([None, None])
-                                voltages.extend([None, None])
-                            else:
-                                inv["frequency"] = (
-                                    aps_int_from_bytes(data, cnt2 + 9, 2) / 10
-                                )
-                                power.append(aps_int_from_bytes(data, cnt2 + 13, 2))
-                                voltages.append(aps_int_from_bytes(data, cnt2 + 15, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 17, 2))
-                                voltages.append(aps_int_from_bytes(data, cnt2 + 19, 2))
-
-                            inv_details = {
-                                "model": INVERTER_MODEL_MAP.get(
-                                    inverter_uid[:2], "Unknown Model"
-                                ),
-                                "channel_qty": 2,
-                                "power": power,
-                                "voltage": voltages,
-                            }
-                            inv.update(inv_details)
-                            cnt2 = cnt2 + 21
-                        elif istr in [
-                            "02",  # YC1000
-                            "05",  # QT2
-                        ]:  # 4-channel inverters
-                            power = []
-                            voltages = []
-
-                            # Should graphs be updated?
-                            if inv["online"]:
-                                inv["temperature"] = (
-                                    aps_int_from_bytes(data, cnt2 + 11, 2) - 100
-                                )
-
-                            if not inv["online"] and not show_graphs:
-                                inv["frequency"] = None
-                                power.extend([None, None, None, None])
-                                voltages.extend([None, None, None])
-                            else:
-                                inv["frequency"] = (
-                                    aps_int_from_bytes(data, cnt2 + 9, 2) / 10
-                                )
-                                power.append(aps_int_from_bytes(data, cnt2 + 13, 2))
-                                voltages.append(aps_int_from_bytes(data, cnt2 + 15, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 17, 2))
-                                voltages.append(aps_int_from_bytes(data, cnt2 + 19, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 21, 2))
-                                voltages.append(aps_int_from_bytes(data, cnt2 + 23, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 25, 2))
-
-                            inv_details = {
-                                "model": INVERTER_MODEL_MAP.get(
-                                    inverter_uid[:2], "Unknown Model"
-                                ),
-                                "channel_qty": 4,
-                                "power": power,
-                                "voltage": voltages,
-                            }
-                            inv.update(inv_details)
-                            cnt2 = cnt2 + 27
-                        elif istr == "03":  # QS1
-                            power = []
-                            voltages = []
-
-                            # Should graphs be updated?
-                            if inv["online"]:
-                                inv["temperature"] = (
-                                    aps_int_from_bytes(data, cnt2 + 11, 2) - 100
-                                )
-                            if not inv["online"] and not show_graphs:
-                                inv["frequency"] = None
-                                voltages.append(None)
-                                power.extend([None, None, None, None])
-                            else:
-                                inv["frequency"] = (
-                                    aps_int_from_bytes(data, cnt2 + 9, 2) / 10
-                                )
-                                power.append(aps_int_from_bytes(data, cnt2 + 13, 2))
-                                voltages.append(aps_int_from_bytes(data, cnt2 + 15, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 17, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 19, 2))
-                                power.append(aps_int_from_bytes(data, cnt2 + 21, 2))
-
-                            inv_details = {
-                                "model": INVERTER_MODEL_MAP.get(
-                                    inverter_uid[:2], "Unknown Model"
-                                ),
-                                "channel_qty": 4,
-                                "power": power,
-                                "voltage": voltages,
-                            }
-                            inv.update(inv_details)
-                            cnt2 = cnt2 + 23
-                        else:
-                            cnt2 = cnt2 + 9
-                        inverters[inverter_uid] = inv
+                        raw = bytes(frame.view[cnt2 : cnt2 + layout.size])
+                        # Share unchanged records with the previous snapshot
+                        inv = known.get(raw)
+                        if inv is None or (
+                            inv.online and inv.signal != signal.get(inv.uid, 0)
+                        ):
+                            inv = self.decode_inverter(
+                                frame, cnt2, layout, signal, show_graphs
+                            )
+                        cnt2 = cnt2 + layout.size
+                        raw_records[raw] = inv
+                        inverters.add(inv)
+                        self.columns.add(inv)
                     cnt1 = cnt1 + 1
+                if inverters.records == previous:
+                    inverters = self.inverters
                 self.inverters = inverters
+                self.raw_records = raw_records
+                self.raw_records_graphs = show_graphs
                 output["inverters"] = inverters
+                output.update(self.columns.aggregates())
                 return output
         return output  # Always returns a dict, even if empty
+
+    def decode_inverter(self, frame, start, layout, signal, show_graphs):
+        """Decode the inverter record at start into an InverterRecord."""
+        uid, online, _, *words = layout.decode(frame.view, start)
+        inverter_uid = uid.hex()
+        inv = InverterRecord(inverter_uid, bool(online))
+
+        # Should the signal graphs be updated?
+        if inv.online:
+            inv.signal = signal.get(inverter_uid, 0)
+        if layout.channels:
+            layout.fill(inv, words, show_graphs)
+            inv.model = INVERTER_MODEL_MAP.get(inverter_uid[:2], "Unknown Model")
+        return inv
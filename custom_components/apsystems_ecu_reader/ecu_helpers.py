@@ -1,7 +1,10 @@
 """helper.py"""
 
 import logging
-import binascii
+import struct
+from collections import deque
+
+from .const import FRAME_HEADER_SIZE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -10,11 +13,29 @@ class APsystemsInvalidData(Exception):
     """Exception for invalid data"""
 
 
+class LazyHex:
+    """
+    Hex rendering of binary data, deferred until it is formatted.
+    Pass it as a logging argument or format it in an error path, frames
+    are then only converted when a message is actually emitted.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self) -> str:
+        return "None" if self.data is None else self.data.hex()
+
+    __repr__ = __str__
+
+
 def aps_str(codec: bytes, start: int, amount: int) -> str:
     """Extract a string from a binary string"""
     try:
         return codec[start : (start + amount)].decode("utf-8")
-    except IndexError as e:
+    except (IndexError, UnicodeDecodeError) as e:
         error = (
             f"Invalid slice: start={start}, amount={amount}, "
             f"codec_length={len(codec)}"
@@ -47,7 +68,7 @@ def aps_int_from_bytes(codec: bytes, start: int, length: int) -> int:
         debugdata = codec[start : start + length]
         error = (
             f"Unable to convert binary to int at position {start}, "
-            f"length {length}, data={debugdata.hex()} "
+            f"length {length}, data={LazyHex(debugdata)} "
             f"due to {str(e)}"
         )
         raise APsystemsInvalidData(error) from e
@@ -64,10 +85,226 @@ def aps_uid(codec: bytes, start: int, length: int = 12) -> str:
         raise APsystemsInvalidData(error) from e
 
 
+# Precompiled big-endian layouts for the integer widths used in ECU frames
+INT_STRUCTS = {1: struct.Struct(">B"), 2: struct.Struct(">H"), 4: struct.Struct(">I")}
+
+
+class FrameView:
+    """
+    Zero-copy field access on a received frame.
+    The aps_* functions slice the frame, which copies every field. FrameView
+    wraps the frame in a memoryview and decodes fields in place, integers
+    through precompiled struct layouts. Out of range fields raise
+    APsystemsInvalidData with the position instead of decoding short data.
+    """
+
+    __slots__ = ("view", "size")
+
+    def __init__(self, frame):
+        self.view = memoryview(frame)
+        self.size = len(self.view)
+
+    def check(self, start: int, amount: int) -> None:
+        """Raise APsystemsInvalidData if a field does not fit in the frame"""
+        if start < 0 or start + amount > self.size:
+            raise APsystemsInvalidData(
+                f"Invalid slice: start={start}, amount={amount}, "
+                f"codec_length={self.size}"
+            )
+
+    def string(self, start: int, amount: int) -> str:
+        """Extract a string"""
+        self.check(start, amount)
+        try:
+            return str(self.view[start : start + amount], "utf-8")
+        except UnicodeDecodeError as e:
+            raise APsystemsInvalidData(
+                f"Unable to decode string at position {start}, length {amount}, "
+                f"data={LazyHex(self.view[start : start + amount])}"
+            ) from e
+
+    def digits(self, start: int, amount: int) -> int:
+        """Extract a number written as ASCII digits"""
+        text = self.string(start, amount)
+        try:
+            return int(text)
+        except ValueError as e:
+            raise APsystemsInvalidData(
+                f"Invalid number {text!r} at position {start}, length {amount}"
+            ) from e
+
+    def integer(self, start: int, length: int) -> int:
+        """Extract a big-endian unsigned integer"""
+        layout = INT_STRUCTS.get(length)
+        if layout is None:
+            self.check(start, length)
+            return int.from_bytes(self.view[start : start + length], "big")
+        try:
+            return layout.unpack_from(self.view, start)[0]
+        except struct.error as e:
+            raise APsystemsInvalidData(
+                f"Unable to convert binary to int at position {start}, "
+                f"length {length}, codec_length={self.size} due to {str(e)}"
+            ) from e
+
+    def uid(self, start: int) -> str:
+        """Extract a 6 byte UID as 12 hex digits"""
+        self.check(start, 6)
+        return self.view[start : start + 6].hex()
+
+    def datetimestamp(self, start: int, amount: int = 7) -> str:
+        """Extract a date and time stored as hex digits"""
+        self.check(start, amount)
+        timestr = self.view[start : start + amount].hex()
+        return (
+            f"{timestr[0:4]}-{timestr[4:6]}-{timestr[6:8]} "
+            f"{timestr[8:10]}:{timestr[10:12]}:{timestr[12:14]}"
+        )
+
+
+class InverterLayout:
+    """
+    Record layout of one inverter type in the inverter query response.
+    Every record starts with the UID, online flag and type code, known
+    types follow with frequency, temperature and a sequence of power (p)
+    and voltage (v) words. The whole record is decoded with one unpack.
+    """
+
+    __slots__ = ("channels", "channel_qty", "power", "voltage", "record", "size")
+
+    def __init__(self, channels: str = "", channel_qty: int = 0):
+        self.channels = channels
+        self.channel_qty = channel_qty
+        # Positions of the power and voltage words in the unpacked words
+        self.power = tuple(i + 2 for i, c in enumerate(channels) if c == "p")
+        self.voltage = tuple(i + 2 for i, c in enumerate(channels) if c == "v")
+        words = "HH" + "H" * len(channels) if channels else ""
+        self.record = struct.Struct(">6sB2s" + words)
+        self.size = self.record.size
+
+    def decode(self, view, start: int) -> tuple:
+        """Unpack the record at start into (uid, online, type, *words)"""
+        try:
+            return self.record.unpack_from(view, start)
+        except struct.error as e:
+            raise APsystemsInvalidData(
+                f"Unable to decode inverter record at position {start}, "
+                f"length {self.size} due to {str(e)}"
+            ) from e
+
+    def fill(self, record, words: tuple, show_graphs: bool) -> None:
+        """Set frequency, temperature, power and voltage on an inverter record"""
+        if record.online:
+            record.temperature = words[1] - 100
+        if not record.online and not show_graphs:
+            record.frequency = None
+            record.power = [None] * len(self.power)
+            record.voltage = [None] * len(self.voltage)
+        else:
+            record.frequency = words[0] / 10
+            record.power = [words[i] for i in self.power]
+            record.voltage = [words[i] for i in self.voltage]
+        record.channel_qty = self.channel_qty
+
+
+# Inverter record layouts by type code, unknown types only carry the UID
+INVERTER_LAYOUTS = {
+    "01": InverterLayout("pvpv", 2),  # YC600/DS3
+    "04": InverterLayout("pvpv", 2),  # DS3D-L/DS3-H
+    "02": InverterLayout("pvpvpvp", 4),  # YC1000
+    "05": InverterLayout("pvpvpvp", 4),  # QT2
+    "03": InverterLayout("pvppp", 4),  # QS1
+}
+UNKNOWN_INVERTER_LAYOUT = InverterLayout()
+
+
+def aps_frame_size(header: bytes) -> int:
+    """Return the total size of a frame from its 'APS11nnnn' header"""
+    if header[:3] != b"APS":
+        raise APsystemsInvalidData(
+            f"signature error in frame header - data={LazyHex(header)}"
+        )
+    try:
+        length = int(header[5:9])
+    except ValueError as e:
+        raise APsystemsInvalidData(
+            f"extracting length from frame header - data={LazyHex(header)}"
+        ) from e
+    # The length field counts everything up to "END", not the trailing newline
+    if length < len(header) + 3:
+        raise APsystemsInvalidData(f"frame length {length} too short in header")
+    return length + 1
+
+
+class FrameParser:
+    """
+    Incremental parser that splits the byte stream of an ECU connection
+    into frames. Chunks of any size are fed in, completed frames are queued
+    in self.frames. The length in the header is checked as soon as the
+    header is in and the "END" signature as soon as the frame is complete,
+    so a corrupt frame raises APsystemsInvalidData without waiting for a
+    timeout. Bytes in front of a frame signature are skipped and bytes
+    after a frame are kept for the next one, which recovers from
+    concatenated responses on persistent connections.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = deque()
+        # total size of the frame being received, None until its header is in
+        self.frame_size = None
+        self.skipped = 0
+
+    def reset(self):
+        """Drop all buffered data, for a new connection."""
+        self.buffer.clear()
+        self.frames.clear()
+        self.frame_size = None
+
+    def feed(self, chunk: bytes) -> int:
+        """Add received bytes and return the number of queued frames."""
+        self.buffer += chunk
+        while True:
+            if self.frame_size is None:
+                start = self.buffer.find(b"APS")
+                if start < 0:
+                    # Keep a possibly incomplete signature at the end
+                    start = max(len(self.buffer) - 2, 0)
+                if start:
+                    self.skipped += start
+                    del self.buffer[:start]
+                if len(self.buffer) < FRAME_HEADER_SIZE:
+                    break
+                try:
+                    self.frame_size = aps_frame_size(self.buffer[:FRAME_HEADER_SIZE])
+                except APsystemsInvalidData:
+                    self.reset()
+                    raise
+            if len(self.buffer) < self.frame_size:
+                break
+            frame = bytes(self.buffer[: self.frame_size])
+            del self.buffer[: self.frame_size]
+            self.frame_size = None
+            if frame[-4:] != b"END\n":
+                self.reset()
+                raise APsystemsInvalidData(
+                    f"signature error in frame trailer - data={LazyHex(frame)}"
+                )
+            self.frames.append(frame)
+        return len(self.frames)
+
+    def missing(self) -> int:
+        """Return how many bytes the frame being received still lacks."""
+        if self.frame_size is None:
+            return FRAME_HEADER_SIZE - len(self.buffer)
+        return self.frame_size - len(self.buffer)
+
+
 def validate_data(data: bytes, cmd: str) -> str:
     """Validate the data received from the ECU"""
     datalen = len(data) - 1
-    debugdata = binascii.b2a_hex(data).decode("ascii")
+    # Only rendered when an error message is built
+    debugdata = LazyHex(data)
     # Validate checksum extraction
     try:
         checksum = int(data[5:9])
@@ -77,7 +314,7 @@ def validate_data(data: bytes, cmd: str) -> str:
     if len(data) - 1 != checksum:
         return f"checksum error on '{cmd}' - checksum={checksum} datalen={datalen} data={debugdata}"
     # Validate start and end signature
-    if aps_str(data, 0, 3) != "APS" or aps_str(data, len(data) - 4, 3) != "END":
+    if data[:3] != b"APS" or data[len(data) - 4 : len(data) - 1] != b"END":
         return f"signature error on '{cmd}' - data={debugdata}"
 
     return ""
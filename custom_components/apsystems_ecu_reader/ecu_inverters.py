@@ -0,0 +1,257 @@
+"""ecu_inverters.py"""
+
+import math
+from array import array
+from collections.abc import Mapping
+from itertools import compress
+
+from .const import ATTRIBUTE_CONTEXT
+
+# Marks a key that is missing in one of two compared cycles
+MISSING = object()
+
+# Most channels of any inverter type, see INVERTER_LAYOUTS
+MAX_CHANNELS = 4
+NAN = math.nan
+
+# Fields of an inverter record, in the order of the former dict keys
+INVERTER_FIELDS = (
+    "uid",
+    "online",
+    "signal",
+    "temperature",
+    "frequency",
+    "model",
+    "channel_qty",
+    "power",
+    "voltage",
+)
+
+
+class InverterRecord(Mapping):
+    """
+    Snapshot of one inverter from the inverter query.
+    Values live in slots instead of a per-inverter dict. Fields the ECU did
+    not report (temperature of an offline inverter, channels of an unknown
+    type) stay unset and are left out of the read-only mapping view, so
+    record["power"] and record.get("temperature") keep working.
+    """
+
+    __slots__ = INVERTER_FIELDS
+
+    def __init__(self, uid, online, signal=None):
+        self.uid = uid
+        self.online = online
+        self.signal = signal
+
+    def __getitem__(self, key):
+        if key not in INVERTER_FIELDS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for key in INVERTER_FIELDS:
+            if hasattr(self, key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, InverterRecord):
+            return self.slot_values() == other.slot_values()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def slot_values(self):
+        """Return the values of all fields, MISSING where unset."""
+        return tuple(getattr(self, key, MISSING) for key in INVERTER_FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class InverterFleet(Mapping):
+    """Inverter records of one inverter query, indexed by UID."""
+
+    __slots__ = ("records",)
+
+    def __init__(self):
+        self.records = {}
+
+    def add(self, record):
+        """Add or replace the record of an inverter."""
+        self.records[record.uid] = record
+
+    def value(self, uid, field, index=None):
+        """Return a field of an inverter, or a channel of it, None if unknown."""
+        record = self.records.get(uid)
+        value = getattr(record, field, None) if field in INVERTER_FIELDS else None
+        if index is None or value is None:
+            return value
+        try:
+            return value[index]
+        except IndexError:
+            return None
+
+    def __getitem__(self, uid):
+        return self.records[uid]
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __repr__(self):
+        return repr(self.records)
+
+
+def changed_keys(previous, current):
+    """
+    Return the keys of two cycle snapshots whose value differs, the key of
+    an inverter field is (uid, field). These keys are also the listener
+    contexts of the entities, see ECUDataUpdateCoordinator. Inverter
+    records shared by both snapshots are skipped without comparing them.
+    """
+    changed = {
+        key
+        for key in previous.keys() | current.keys()
+        if key != "inverters"
+        and previous.get(key, MISSING) != current.get(key, MISSING)
+    }
+    before = previous.get("inverters", {})
+    after = current.get("inverters", {})
+    if before is after:
+        return changed
+    for uid in before.keys() | after.keys():
+        old = before.get(uid, {})
+        new = after.get(uid, {})
+        if old is new:
+            continue
+        for field in INVERTER_FIELDS:
+            if old.get(field, MISSING) != new.get(field, MISSING):
+                changed.add((uid, field))
+    return changed
+
+
+def data_context(key):
+    """
+    Return the listener context of an entity that shows the value of key
+    and the last_data_update attribute, it is notified when either changes.
+    """
+    return frozenset((key, ATTRIBUTE_CONTEXT))
+
+
+class FleetColumns:
+    """
+    Columnar copy of the inverter records of one inverter query.
+    Power has one slot per channel, voltage (first phase), temperature,
+    frequency, online state and model one slot per inverter. Values the
+    ECU did not report are NaN, missing power counts as 0. The arrays keep
+    their size between cycles and are overwritten in place, so fleet
+    aggregates come from contiguous memory instead of walking the records.
+    """
+
+    __slots__ = (
+        "power",
+        "inverter_power",
+        "voltage",
+        "temperature",
+        "frequency",
+        "online",
+        "model",
+        "models",
+        "model_index",
+        "count",
+        "channels",
+    )
+
+    def __init__(self):
+        self.power = array("d")
+        self.inverter_power = array("d")
+        self.voltage = array("d")
+        self.temperature = array("d")
+        self.frequency = array("d")
+        self.online = array("b")
+        self.model = array("H")
+        # model names, indexed by the values in self.model
+        self.models = []
+        self.model_index = {}
+        self.count = 0
+        self.channels = 0
+
+    def clear(self, inverter_qty=0):
+        """Start a new cycle, the arrays only grow when the fleet does."""
+        self.count = 0
+        self.channels = 0
+        for column in (
+            self.inverter_power,
+            self.voltage,
+            self.temperature,
+            self.frequency,
+            self.online,
+            self.model,
+        ):
+            if len(column) < inverter_qty:
+                column.extend([0] * (inverter_qty - len(column)))
+        if len(self.power) < inverter_qty * MAX_CHANNELS:
+            self.power.extend([0] * (inverter_qty * MAX_CHANNELS - len(self.power)))
+
+    def add(self, record):
+        """Store the values of an inverter record in the next slot."""
+        index = self.count
+        channel = self.channels
+        total = 0
+        for value in getattr(record, "power", ()):
+            value = value or 0
+            self.power[channel] = value
+            total += value
+            channel += 1
+        self.channels = channel
+        voltage = getattr(record, "voltage", None)
+        voltage = voltage[0] if voltage else None
+        temperature = getattr(record, "temperature", None)
+        frequency = getattr(record, "frequency", None)
+        self.inverter_power[index] = total
+        self.voltage[index] = NAN if voltage is None else voltage
+        self.temperature[index] = NAN if temperature is None else temperature
+        self.frequency[index] = NAN if frequency is None else frequency
+        self.online[index] = record.online
+        model = getattr(record, "model", "Unknown Model")
+        if model not in self.model_index:
+            self.model_index[model] = len(self.models)
+            self.models.append(model)
+        self.model[index] = self.model_index[model]
+        self.count = index + 1
+
+    def aggregates(self):
+        """Return fleet totals, temperature statistics and power per model."""
+        count = self.count
+        online = self.online[:count]
+        temperature = [
+            value
+            for value in compress(self.temperature[:count], online)
+            if not math.isnan(value)
+        ]
+        model_power = dict.fromkeys(self.models, 0)
+        for model, power in zip(self.model[:count], self.inverter_power[:count]):
+            model_power[self.models[model]] += power
+        return {
+            "fleet_power": round(math.fsum(self.power[: self.channels])),
+            "fleet_temperature_min": min(temperature, default=None),
+            "fleet_temperature_max": max(temperature, default=None),
+            "fleet_temperature_mean": (
+                round(math.fsum(temperature) / len(temperature), 1)
+                if temperature
+                else None
+            ),
+            "fleet_offline": count - sum(online),
+            "fleet_model_power": {
+                model: round(power) for model, power in model_power.items() if power
+            },
+        }
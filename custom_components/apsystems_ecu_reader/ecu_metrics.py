@@ -0,0 +1,48 @@
+"""ecu_metrics.py"""
+
+import math
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .const import LATENCY_PHASES, LATENCY_WINDOW
+
+
+class LatencyStats:
+    """Rolling latency statistics of one phase of the update cycle."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        """Add a sample, stored in milliseconds."""
+        self.samples.append(seconds * 1000)
+
+    @contextmanager
+    def measure(self):
+        """Time the enclosed block, also when it fails."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(time.monotonic() - start)
+
+    def summary(self):
+        """Return last, mean, p95 and max in milliseconds."""
+        if not self.samples:
+            return {"last": None, "mean": None, "p95": None, "max": None, "count": 0}
+        ordered = sorted(self.samples)
+        p95 = ordered[math.ceil(0.95 * len(ordered)) - 1]
+        return {
+            "last": round(self.samples[-1], 2),
+            "mean": round(statistics.fmean(ordered), 2),
+            "p95": round(p95, 2),
+            "max": round(ordered[-1], 2),
+            "count": len(ordered),
+        }
+
+
+def latency_table():
+    """Return a fresh set of statistics for every instrumented phase."""
+    return {phase: LatencyStats() for phase in LATENCY_PHASES}
@@ -0,0 +1,99 @@
+"""ecu_recorder.py"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from .const import RECORDER_MAX_BYTES, RECORDER_BACKUPS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FrameRecorder:
+    """
+    Record the raw frames of every update cycle for offline analysis.
+    Each cycle becomes one JSON line holding a timestamp, the ECU-ID, the
+    hex encoded ECU, inverter and signal frames received in that cycle and
+    the meter data. Lines are appended to frames_<ECU-ID>.jsonl.gz which is
+    rotated to .1, .2, ... once it grows beyond max_bytes.
+    """
+
+    def __init__(
+        self, directory, max_bytes=RECORDER_MAX_BYTES, backups=RECORDER_BACKUPS
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.pending = []
+
+    def path(self, ecu_id):
+        """Return the file the frames of an ECU are written to."""
+        return self.directory / f"frames_{ecu_id}.jsonl.gz"
+
+    def add(self, ecu_id, frames, timestamp=None):
+        """Queue the frames of one cycle, bytes are stored as hex."""
+        record = {"time": time.time() if timestamp is None else timestamp}
+        record["ecu_id"] = ecu_id
+        for kind, frame in frames.items():
+            if isinstance(frame, (bytes, bytearray)):
+                frame = frame.hex()
+            record[kind] = frame
+        self.pending.append(record)
+
+    async def flush(self):
+        """Write the queued records from an executor thread."""
+        if not self.pending:
+            return
+        records, self.pending = self.pending, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.write, records)
+        except OSError as err:
+            _LOGGER.warning("Unable to record ECU frames: %s", err)
+
+    def write(self, records):
+        """Append records to the recording files, blocking."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for record in records:
+            path = self.path(record["ecu_id"])
+            self.rotate(path)
+            # Every write appends a gzip member, gzip.open reads them as one
+            with gzip.open(path, "at", encoding="utf-8") as file:
+                file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def rotate(self, path):
+        """Shift path to path.1, path.1 to path.2, ... when it is full."""
+        if not path.exists() or path.stat().st_size < self.max_bytes:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = path.with_name(f"{path.name}.{index}")
+            if older.exists():
+                os.replace(older, path.with_name(f"{path.name}.{index + 1}"))
+        if self.backups:
+            os.replace(path, path.with_name(f"{path.name}.1"))
+        else:
+            path.unlink()
+
+
+def recording_files(path):
+    """Return a recording and its rotated backups, oldest first."""
+    path = Path(path)
+    backups = [
+        backup
+        for backup in path.parent.glob(f"{path.name}.*")
+        if backup.suffix[1:].isdigit()
+    ]
+    backups.sort(key=lambda backup: int(backup.suffix[1:]), reverse=True)
+    return [*backups, path] if path.exists() else backups
+
+
+def read_recording(paths):
+    """Yield the recorded cycles of one or more files in order, blocking."""
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
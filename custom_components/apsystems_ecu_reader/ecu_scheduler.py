@@ -0,0 +1,178 @@
+"""ecu_scheduler.py"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .const import DEFAULT_ECU_REFRESH_PERIOD
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bounds for a plausible ECU refresh period in seconds
+MIN_REFRESH_PERIOD = 60
+MAX_REFRESH_PERIOD = 3600
+# Coordinator ticks are not exact, a tier is due slightly before its interval
+SCHEDULE_TOLERANCE = 2
+# Gaps further than this fraction from a multiple of the period count as drift
+DRIFT_TOLERANCE = 0.1
+# Poll this many seconds after the ECU's expected refresh
+PHASE_OFFSET = 30
+MIN_PHASE_DELAY = 30
+# Tolerated difference between the ECU clock and the HA clock
+MAX_CLOCK_SKEW = 120
+# Stop doubling the idle interval after this many idle cycles
+MAX_IDLE_DOUBLINGS = 10
+# Time zones by name, None if unknown. Loading a zone reads its file, so
+# every zone is loaded once and off the event loop, see async_time_zone()
+TIME_ZONES = {}
+
+
+class RefreshCycleTracker:
+    """
+    Learn how often the ECU refreshes its inverter data.
+    The inverter frame carries the time of the ECU's last data refresh.
+    Whenever that timestamp advances, the gap to the previous one is kept.
+    The shortest recent gap is the refresh period, longer gaps are
+    multiples of it caused by polls that missed a refresh.
+    """
+
+    def __init__(self, default_period=DEFAULT_ECU_REFRESH_PERIOD, history=6):
+        self.default_period = default_period
+        self.periods = deque(maxlen=history)
+        self.timestamp = None
+        self.seen_at = None
+
+    @property
+    def period(self):
+        """Return the learned refresh period in seconds."""
+        return min(self.periods) if self.periods else self.default_period
+
+    def observe(self, timestamp, now=None):
+        """Record the timestamp of the latest inverter frame, True if it advanced."""
+        try:
+            moment = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return False
+        if moment == self.timestamp:
+            return False
+
+        if self.timestamp is not None and moment > self.timestamp:
+            gap = (moment - self.timestamp).total_seconds()
+            if MIN_REFRESH_PERIOD <= gap <= MAX_REFRESH_PERIOD:
+                self.periods.append(gap)
+        self.timestamp = moment
+        self.seen_at = time.monotonic() if now is None else now
+        return True
+
+    def is_due(self, now=None):
+        """Return True when the ECU is expected to have refreshed its data."""
+        if self.seen_at is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now >= self.seen_at + self.period
+
+    def is_stable(self):
+        """Return True when all observed gaps are whole multiples of the period."""
+        period = self.period
+        return all(
+            abs(gap / period - round(gap / period)) <= DRIFT_TOLERANCE
+            for gap in self.periods
+        )
+
+
+async def async_time_zone(name):
+    """Return the time zone of a name, None if unknown."""
+    if not name:
+        return None
+    if name not in TIME_ZONES:
+        try:
+            TIME_ZONES[name] = await asyncio.get_running_loop().run_in_executor(
+                None, ZoneInfo, name
+            )
+        except (ZoneInfoNotFoundError, ValueError):
+            TIME_ZONES[name] = None
+    return TIME_ZONES[name]
+
+
+def idle_backoff_delay(scan_interval, idle_cycles, max_interval):
+    """Double the scan interval for every idle cycle, up to max_interval."""
+    doublings = min(idle_cycles, MAX_IDLE_DOUBLINGS)
+    return max(scan_interval, min(scan_interval * 2**doublings, max_interval))
+
+
+def phase_aligned_delay(tracker, ecu_zone, scan_interval, now=None):
+    """
+    Return the delay in seconds that places the next poll shortly after an
+    expected ECU refresh, the latest one that keeps within the scan interval.
+    The delay never exceeds the scan interval, when the next refresh lies
+    too close to it the poll runs at the scan interval instead. ecu_zone is
+    the time zone of the ECU clock, see async_time_zone(). Returns None when
+    the fixed scan interval should be used instead: no timestamp or time
+    zone, a drifting refresh cycle, an ECU clock that is off, or a scan
+    interval shorter than the refresh period.
+    """
+    period = tracker.period
+    if (
+        tracker.timestamp is None
+        or ecu_zone is None
+        or scan_interval < period
+        or not tracker.is_stable()
+    ):
+        return None
+    refreshed = tracker.timestamp.replace(tzinfo=ecu_zone)
+
+    now = now or datetime.now(timezone.utc)
+    age = (now - refreshed).total_seconds()
+    if age < -MAX_CLOCK_SKEW or age > scan_interval + 2 * period:
+        _LOGGER.debug("ECU data timestamp %s is off, not aligning polls", refreshed)
+        return None
+
+    cycles = max(1, int((age + scan_interval - PHASE_OFFSET) // period))
+    delay = cycles * period + PHASE_OFFSET - age
+    while delay < MIN_PHASE_DELAY:
+        delay += period
+    return min(delay, scan_interval)
+
+
+class QuerySchedule:
+    """
+    Cadences of the individual queries within one coordinator cycle.
+    The ECU base query runs every cycle. The inverter query runs once its
+    interval has passed. The signal query and the ECU-C meter fetch either
+    follow the inverter query (interval 0) or run on their own interval.
+    """
+
+    def __init__(self):
+        self.intervals = {"inverter": 0, "signal": 0, "meter": 0}
+        self.last_run = {}
+
+    def set_intervals(self, inverter=0, signal=0, meter=0):
+        """Set the query intervals in seconds."""
+        self.intervals = {"inverter": inverter, "signal": signal, "meter": meter}
+
+    def elapsed(self, tier, now):
+        """Return True when the interval of a tier has passed."""
+        last_run = self.last_run.get(tier)
+        if last_run is None:
+            return True
+        return now - last_run >= self.intervals[tier] - SCHEDULE_TOLERANCE
+
+    def due(self, inverter_ready=True, now=None):
+        """Return the set of tiers to query in this cycle."""
+        now = time.monotonic() if now is None else now
+        tiers = set()
+        if inverter_ready and self.elapsed("inverter", now):
+            tiers.add("inverter")
+        for tier in ("signal", "meter"):
+            if self.intervals[tier] and self.elapsed(tier, now):
+                tiers.add(tier)
+            elif not self.intervals[tier] and "inverter" in tiers:
+                tiers.add(tier)
+        return tiers
+
+    def mark_run(self, tier, now=None):
+        """Record a successful query of a tier."""
+        self.last_run[tier] = time.monotonic() if now is None else now
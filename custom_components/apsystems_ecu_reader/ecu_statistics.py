@@ -0,0 +1,142 @@
+"""ecu_statistics.py"""
+
+import logging
+import statistics
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.const import UnitOfPower
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, METER_STATISTICS_GRACE, METER_STATISTICS_STORAGE_VERSION
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # Home Assistant before 2025.4 only knows has_mean
+    StatisticMeanType = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# Meter graph series by the CT they measure, and the phases of every sample
+METER_SERIES = {"power1": "production", "power2": "grid"}
+METER_PHASES = ("A", "B", "C")
+HOUR = timedelta(hours=1)
+
+
+def hour_start(moment):
+    """Return the start of the hour of an aware datetime."""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class MeterStatisticsImporter:
+    """
+    Import the meter graph history of an ECU-C into long-term statistics.
+    The meter graph holds the samples of the whole day, of which only the
+    newest is shown by the sensors. Every completed hour after the last
+    imported one becomes a mean, minimum and maximum per CT and phase,
+    added as external statistics. The end of the last imported hour is
+    kept in a Store, so hours are imported once, also across restarts.
+    """
+
+    def __init__(self, hass, ecu_id):
+        self.hass = hass
+        self.ecu_id = ecu_id
+        self.store = Store(
+            hass, METER_STATISTICS_STORAGE_VERSION, f"{DOMAIN}.meter_{ecu_id}"
+        )
+        # end of the last imported hour (UTC), None before the first import
+        self.imported_until = None
+
+    async def async_load(self):
+        """Restore the end of the last imported hour."""
+        data = await self.store.async_load() or {}
+        if data.get("imported_until"):
+            self.imported_until = datetime.fromisoformat(data["imported_until"])
+
+    def zone(self, ecu_zone):
+        """Return the time zone of the ECU clock, the HA time zone if unknown."""
+        return ecu_zone or dt_util.DEFAULT_TIME_ZONE
+
+    def prepare(self, meter_graph, ecu_zone, now=None):
+        """Let the next meter graph fetch collect samples when an hour completed."""
+        now = now or datetime.now(timezone.utc)
+        if self.imported_until is None:
+            meter_graph.since = ""
+        elif now - self.imported_until >= HOUR:
+            since = self.imported_until.astimezone(self.zone(ecu_zone))
+            meter_graph.since = since.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            meter_graph.since = None
+
+    async def async_import(self, meter_graph, ecu_zone, now=None):
+        """Import the completed hours of the samples the fetch collected."""
+        if not meter_graph.history:
+            return
+        history, meter_graph.history = meter_graph.history, {}
+        zone = self.zone(ecu_zone)
+        hours = {}
+        newest = None
+        for series, name in METER_SERIES.items():
+            for sample in history.get(series) or ():
+                try:
+                    moment = datetime.strptime(sample["time"], "%Y-%m-%d %H:%M:%S")
+                except (KeyError, TypeError, ValueError):
+                    continue
+                moment = moment.replace(tzinfo=zone).astimezone(timezone.utc)
+                newest = moment if newest is None else max(newest, moment)
+                for phase in METER_PHASES:
+                    try:
+                        value = float(sample[f"power{phase}"])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    by_hour = hours.setdefault((name, phase), {})
+                    by_hour.setdefault(hour_start(moment), []).append(value)
+        if newest is None:
+            return
+
+        # An hour is complete once a later sample exists or the grace passed
+        now = now or datetime.now(timezone.utc)
+        complete = hour_start(
+            max(newest, now - timedelta(seconds=METER_STATISTICS_GRACE))
+        )
+        if self.imported_until is not None and complete <= self.imported_until:
+            return
+        for (name, phase), by_hour in hours.items():
+            rows = [
+                {
+                    "start": start,
+                    "mean": statistics.fmean(values),
+                    "min": min(values),
+                    "max": max(values),
+                }
+                for start, values in sorted(by_hour.items())
+                if start < complete
+                and (self.imported_until is None or start >= self.imported_until)
+            ]
+            if rows:
+                async_add_external_statistics(
+                    self.hass, self.metadata(name, phase), rows
+                )
+        _LOGGER.debug(
+            "ECU %s meter statistics imported until %s", self.ecu_id, complete
+        )
+        self.imported_until = complete
+        meter_graph.since = None
+        await self.store.async_save({"imported_until": complete.isoformat()})
+
+    def metadata(self, name, phase):
+        """Return the statistic metadata of one CT phase."""
+        metadata = {
+            "has_mean": True,
+            "has_sum": False,
+            "name": f"ECU {self.ecu_id} {name} CT phase {phase}",
+            "source": DOMAIN,
+            "statistic_id": f"{DOMAIN}:{self.ecu_id}_{name}_ct_{phase.lower()}",
+            "unit_of_measurement": UnitOfPower.WATT,
+        }
+        if StatisticMeanType is not None:
+            metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+        return metadata
@@ -0,0 +1,97 @@
+"""ecu_writes.py"""
+
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """
+    Coalesce writes to the web UI of one ECU into batches.
+    Every write has a key, the inverter it is for. Writes that arrive
+    within window seconds of the first one are sent together by one call
+    of flush(values), values being the pending value of every key. With
+    max_delay set, every write restarts the window instead (debounce), but
+    the first write of a batch waits no longer than max_delay seconds. A
+    later write to a key replaces the pending one, whose caller gets None.
+    flush() returns the result of every key in a dict, or one result for
+    the whole batch. Batches are flushed one at a time.
+    """
+
+    def __init__(self, flush, window, max_delay=None):
+        self.flush = flush
+        self.window = window
+        self.max_delay = max_delay
+        # key -> (value, future of the caller)
+        self.pending = {}
+        # task of the batch collecting writes and of every unfinished batch
+        self.task = None
+        self.tasks = set()
+        self.lock = asyncio.Lock()
+        # loop time of the first write of the batch and of its flush
+        self.started = 0
+        self.flush_at = 0
+
+    async def submit(self, key, value):
+        """Queue a write and return its result once its batch was sent."""
+        loop = asyncio.get_running_loop()
+        replaced = self.pending.pop(key, None)
+        if replaced and not replaced[1].done():
+            replaced[1].set_result(None)
+        future = loop.create_future()
+        self.pending[key] = (value, future)
+        now = loop.time()
+        if self.task is None:
+            self.started = now
+            self.flush_at = now + self.window
+            self.task = loop.create_task(self.run())
+            self.tasks.add(self.task)
+            self.task.add_done_callback(self.tasks.discard)
+        elif self.max_delay is not None:
+            self.flush_at = min(now + self.window, self.started + self.max_delay)
+        return await future
+
+    async def run(self):
+        """Wait for the window to close and send the pending writes."""
+        loop = asyncio.get_running_loop()
+        while (delay := self.flush_at - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        pending = {}
+        try:
+            async with self.lock:
+                pending, self.pending = self.pending, {}
+                # Writes arriving from now on wait for the next batch
+                self.task = None
+                results = await self.flush(
+                    {key: value for key, (value, _) in pending.items()}
+                )
+        except Exception as err:  # noqa: BLE001 - handed to the callers
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_exception(err)
+            return
+        else:
+            _LOGGER.debug("Sent %s queued writes in one batch", len(pending))
+            for key, (_, future) in pending.items():
+                if not future.done():
+                    future.set_result(
+                        results.get(key, False)
+                        if isinstance(results, dict)
+                        else results
+                    )
+        finally:
+            # Cancelled while sending, the callers must not wait forever
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_result(False)
+
+    def cancel(self):
+        """Drop the pending writes and stop the batches, their callers get False."""
+        for task in self.tasks:
+            task.cancel()
+        self.task = None
+        pending, self.pending = self.pending, {}
+        for _, future in pending.values():
+            if not future.done():
+                future.set_result(False)
@@ -1,5 +1,6 @@
 """GUI helper functions for the ECU UI (ECU-R-Pro and ECU-C)."""
 
+import hashlib
 import logging
 import re
 from datetime import datetime
@@ -12,56 +13,85 @@ from homeassistant.components.persistent_notification import (
     create as persistent_notification_create,
 )
 
+from .const import GUI_CONNECTION_LIMIT, GUI_KEEPALIVE_TIMEOUT
+
 _LOGGER = logging.getLogger(__name__)
 
 
-async def set_inverter_state(ipaddr, inverter_id, state) -> bool:
+def create_gui_session():
+    """
+    Return a pooled session for the web UI of one ECU.
+    Connections are kept alive and limited, so retries and meter polls reuse
+    them instead of hitting the small web server with fresh connections.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=GUI_CONNECTION_LIMIT, keepalive_timeout=GUI_KEEPALIVE_TIMEOUT
+        )
+    )
+
+
+async def set_inverter_state(session, ipaddr, inverter_id, state) -> bool:
     """Set the on/off state of an inverter. 1=on, 2=off"""
-    action = {"ids[]": f"{inverter_id}1" if state else f"{inverter_id}2"}
+    return await set_inverter_states(session, ipaddr, {inverter_id: state})
+
+
+async def set_inverter_states(session, ipaddr, states) -> bool:
+    """
+    Set the on/off state of several inverters in one request, states maps
+    the inverter UID to True (on) or False (off). The ECU answers once for
+    the whole batch.
+    """
+    action = [
+        ("ids[]", f"{inverter_id}1" if state else f"{inverter_id}2")
+        for inverter_id, state in states.items()
+    ]
+    inverters = ", ".join(
+        f"{inverter_id} {'on' if state else 'off'}"
+        for inverter_id, state in states.items()
+    )
     headers = {"X-Requested-With": "XMLHttpRequest", "Connection": "keep-alive"}
     url = f"http://{ipaddr}/index.php/configuration/set_switch_state"
 
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    url, headers=headers, data=action, timeout=15
-                ) as response:
-                    response_text = await response.text()
-                    message_match = re.search(r'"message":"([^"]+)"', response_text)
-                    message = message_match.group(1) if message_match else ""
-                    _LOGGER.debug(
-                        "Response from ECU on switching the inverter %s to state %s: %s",
-                        inverter_id,
-                        "on" if state else "off",
-                        message,
-                    )
-                    if message == "See the results 5 minutes later !":
-                        return True
-
-                    _LOGGER.debug(
-                        "Retrying inverter state change for %s (attempt %d/%d)",
-                        inverter_id,
-                        attempt + 1,
-                        max_retries,
-                    )
-                    await asyncio.sleep(2)
+            async with session.post(
+                url, headers=headers, data=action, timeout=15
+            ) as response:
+                response_text = await response.text()
+                message_match = re.search(r'"message":"([^"]+)"', response_text)
+                message = message_match.group(1) if message_match else ""
+                _LOGGER.debug(
+                    "Response from ECU on switching the inverters %s: %s",
+                    inverters,
+                    message,
+                )
+                if message == "See the results 5 minutes later !":
+                    return True
+
+                _LOGGER.debug(
+                    "Retrying inverter state change for %s (attempt %d/%d)",
+                    inverters,
+                    attempt + 1,
+                    max_retries,
+                )
+                await asyncio.sleep(2)
         except (
             aiohttp.ClientError,
             aiohttp.ClientConnectionError,
             asyncio.TimeoutError,
         ) as err:
             _LOGGER.debug(
-                "Attempt to switch inverter %s failed with error: %s\n\t"
+                "Attempt to switch inverters %s failed with error: %s\n\t"
                 "This switch is only compatible with ECU-ID 2162... series and ECU-C models",
-                inverter_id,
+                inverters,
                 err,
             )
     return False
 
 
-async def set_zero_export(ipaddr, state, power_limit=0):
+async def set_zero_export(session, ipaddr, state, power_limit=0):
     """Set the bridge state for zero export. 0=closed, 1=open"""
     action = {
         "meter_func": "1" if state else "0",
@@ -72,16 +102,15 @@ async def set_zero_export(ipaddr, state, power_limit=0):
     url = f"http://{ipaddr}/index.php/meter/set_meter_display_funcs"
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url, headers=headers, data=action, timeout=15
-            ) as response:
-                response_text = await response.text()
-                _LOGGER.debug(
-                    "Response from ECU on bridging zero export to state %s: %s",
-                    "open" if state else "close",
-                    re.search(r'"message":"([^"]+)"', response_text).group(1),
-                )
+        async with session.post(
+            url, headers=headers, data=action, timeout=15
+        ) as response:
+            response_text = await response.text()
+            _LOGGER.debug(
+                "Response from ECU on bridging zero export to state %s: %s",
+                "open" if state else "close",
+                re.search(r'"message":"([^"]+)"', response_text).group(1),
+            )
 
     except (
         aiohttp.ClientError,
@@ -95,34 +124,65 @@ async def set_zero_export(ipaddr, state, power_limit=0):
         )
 
 
-async def set_inverter_max_power(ipaddr, inverter_uid, max_panel_power):
-    """Set the max power for an inverter."""
+async def set_inverter_max_power(
+    session, ipaddr, inverter_uid, max_panel_power
+) -> bool:
+    """
+    Set the max power for an inverter. The ECU answers HTTP 200 also when it
+    rejects the write, only a value of 0 in its reply means it was taken.
+    """
     action = {"id": inverter_uid, "maxpower": max_panel_power}
     headers = {"X-Requested-With": "XMLHttpRequest"}
     url = f"http://{ipaddr}/index.php/configuration/set_maxpower"
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url, headers=headers, data=action, timeout=15
-            ) as response:
-                response_text = await response.text()
-                _LOGGER.debug(
-                    "Response from ECU on setting panel max power to %s for inverter %s: %s",
-                    max_panel_power,
-                    inverter_uid,
-                    re.search(r'"message":"([^"]+)"', response_text).group(1),
-                )
+        async with session.post(
+            url, headers=headers, data=action, timeout=15
+        ) as response:
+            response_text = await response.text()
+            message_match = re.search(r'"message":"([^"]+)"', response_text)
+            message = message_match.group(1) if message_match else ""
+            value_match = re.search(r'"value":\s*(\d+)', response_text)
+            _LOGGER.debug(
+                "Response from ECU on setting panel max power to %s for inverter %s: %s",
+                max_panel_power,
+                inverter_uid,
+                message,
+            )
+            if response.status == 200 and value_match and value_match.group(1) == "0":
+                return True
+            _LOGGER.warning(
+                "ECU rejected max power %s for inverter %s: %s",
+                max_panel_power,
+                inverter_uid,
+                message or f"HTTP status {response.status}",
+            )
+            return False
     except (
         aiohttp.ClientError,
         aiohttp.ClientConnectionError,
         asyncio.TimeoutError,
     ) as err:
         _LOGGER.error("Error setting max power for inverter %s: %s", inverter_uid, err)
-        return err
+        return False
 
 
-async def reboot_ecu(ipaddr, wifi_ssid, wifi_password, cached_data):
+async def set_inverter_max_powers(session, ipaddr, max_powers) -> dict:
+    """
+    Set the max power of several inverters, max_powers maps the inverter
+    UID to its max power. The ECU takes one inverter per request and drops
+    concurrent writes, so the requests are sent one after another. Returns
+    the result of every inverter.
+    """
+    return {
+        inverter_uid: await set_inverter_max_power(
+            session, ipaddr, inverter_uid, max_panel_power
+        )
+        for inverter_uid, max_panel_power in max_powers.items()
+    }
+
+
+async def reboot_ecu(session, ipaddr, wifi_ssid, wifi_password, cached_data):
     """Reboot the ECU (compatible with ECU-ID 2162... series and ECU-C models)"""
     ecu_id = cached_data.get("ecu_id", None)
     action = {
@@ -136,9 +196,8 @@ async def reboot_ecu(ipaddr, wifi_ssid, wifi_password, cached_data):
     url = "http://" + str(ipaddr) + "/index.php/management/set_wlan_ap"
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=action) as response:
-                return await response.text()
+        async with session.post(url, headers=headers, data=action) as response:
+            return await response.text()
     except (
         aiohttp.ClientError,
         aiohttp.ClientConnectionError,
@@ -148,50 +207,106 @@ async def reboot_ecu(ipaddr, wifi_ssid, wifi_password, cached_data):
         return err
 
 
-async def get_power_meter_graph_data(ipaddr):
-    """Fetch data from the meter power graph endpoint."""
+class MeterGraphCache:
+    """Digest and newest samples of the last meter graph of one ECU."""
+
+    __slots__ = ("digest", "data", "since", "history")
+
+    def __init__(self):
+        # length and hash of the raw body, equal for an unchanged graph
+        self.digest = None
+        self.data = None
+        # ECU time from which samples are collected, None to collect nothing
+        self.since = None
+        # samples collected by the last fetch, by series
+        self.history = {}
+
+
+def meter_value(sample, phase):
+    """Return the power of a phase in a meter graph sample, None if missing."""
+    return sample.get(f"power{phase}") if isinstance(sample, dict) else None
+
+
+def meter_history(samples, since):
+    """Return the samples of a series taken at or after since."""
+    # "YYYY-MM-DD HH:MM:SS" sorts in time order
+    return [
+        sample
+        for sample in samples or ()
+        if not isinstance(sample, dict) or str(sample.get("time", since)) >= since
+    ]
+
+
+async def get_power_meter_graph_data(session, ipaddr, timeout=15, cache=None):
+    """
+    Fetch the newest sample of every series of the meter power graph.
+    The graph holds the whole day, only the last sample of a series is
+    kept. With a cache, a graph whose raw body did not change returns the
+    previous result without decoding it again. When cache.since is set, the
+    samples from then on are left in cache.history for the statistics.
+    """
     url = f"http://{ipaddr}/index.php/meter/old_meter_power_graph"
     headers = {"X-Requested-With": "XMLHttpRequest"}
+    if cache is not None:
+        cache.history = {}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    data = await response.text()
-                    try:
-                        data = json.loads(data)  # Convert the string to a JSON object
-                    except json.JSONDecodeError as err:
-                        _LOGGER.warning("Failed to decode JSON response: %s", err)
-                        return None
-
-                    _LOGGER.debug("Parsed data: %s", data)
-
-                    # Map the data to sensor properties and add calculated fields
-                    mapped_data = {
-                        f"{prefix}_ct_{phase.lower()}": (
-                            data[f"power{index}"][-1][f"power{phase}"]
-                            if data[f"power{index}"]
-                            else None
-                        )
-                        for index, prefix in enumerate(["production", "grid"], start=1)
-                        for phase in ["A", "B", "C"]
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status == 200:
+                body = await response.read()
+                digest = (len(body), hashlib.blake2b(body, digest_size=16).digest())
+                if cache is not None and cache.data and digest == cache.digest:
+                    _LOGGER.debug("Meter graph unchanged, reusing the last samples")
+                    return cache.data
+                try:
+                    graph = json.loads(body)
+                    if not isinstance(graph, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as err:
+                    _LOGGER.warning("Failed to decode JSON response: %s", err)
+                    return None
+                data = {
+                    series: (
+                        samples[-1] if isinstance(samples, list) and samples else None
+                    )
+                    for series, samples in graph.items()
+                }
+                if cache is not None and cache.since is not None:
+                    cache.history = {
+                        series: meter_history(samples, cache.since)
+                        for series, samples in graph.items()
+                        if isinstance(samples, list)
                     }
 
-                    mapped_data.update(
-                        {
-                            f"consumed_{phase}": (
-                                (mapped_data[f"production_ct_{phase}"] or 0)
-                                + (mapped_data[f"grid_ct_{phase}"] or 0)
-                            )
-                            for phase in ["a", "b", "c"]
-                        }
-                    )
-                    return mapped_data
-                else:
-                    _LOGGER.error(
-                        "Failed fetching graph data. HTTP status: %s", response.status
+                _LOGGER.debug("Parsed data: %s", data)
+
+                # Map the data to sensor properties and add calculated fields
+                mapped_data = {
+                    f"{prefix}_ct_{phase.lower()}": meter_value(
+                        data.get(f"power{index}"), phase
                     )
-                    return None
+                    for index, prefix in enumerate(["production", "grid"], start=1)
+                    for phase in ["A", "B", "C"]
+                }
+
+                mapped_data.update(
+                    {
+                        f"consumed_{phase}": (
+                            (mapped_data[f"production_ct_{phase}"] or 0)
+                            + (mapped_data[f"grid_ct_{phase}"] or 0)
+                        )
+                        for phase in ["a", "b", "c"]
+                    }
+                )
+                if cache is not None:
+                    cache.digest = digest
+                    cache.data = mapped_data
+                return mapped_data
+            else:
+                _LOGGER.error(
+                    "Failed fetching graph data. HTTP status: %s", response.status
+                )
+                return None
     except (
         aiohttp.ClientError,
         aiohttp.ClientConnectionError,
@@ -1,11 +1,15 @@
 """Number platform for APsystems ECU Reader."""
 
+import logging
+
 from homeassistant.components.number import RestoreNumber
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import EntityCategory
 
 
-from .const import DOMAIN, INVERTER_MODEL_MAP, ECU_MODEL_MAP
+from .const import DOMAIN, INVERTER_MODEL_MAP, ECU_MODEL_MAP, AVAILABILITY_CONTEXT
+
+_LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
@@ -35,7 +39,7 @@ class InverterMaxPwrNumber(CoordinatorEntity, RestoreNumber):
 
     def __init__(self, coordinator, ecu, inverter_id, inverter_data):
         """Initialize the number entity."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=AVAILABILITY_CONTEXT)
         self._ecu = ecu
         self._uid = inverter_id
         self._inv_data = inverter_data
@@ -46,6 +50,8 @@ class InverterMaxPwrNumber(CoordinatorEntity, RestoreNumber):
         self._attr_native_step = 1
         default_value = self._inv_data.get("number_value") or 500
         self._attr_native_value = max(default_value, 20)
+        # last value the ECU accepted, shown again when a write fails
+        self._accepted_value = self._attr_native_value
         self._attr_device_class = "power"
         self._attr_mode = "slider"
 
@@ -69,10 +75,22 @@ class InverterMaxPwrNumber(CoordinatorEntity, RestoreNumber):
         return EntityCategory.CONFIG
 
     async def async_set_native_value(self, value: float):
-        """Update the current value."""
-        await self._ecu.set_inverter_max_power(self._uid, value)
+        """Update the current value, the ECU write is debounced."""
         self._attr_native_value = value
         self.async_write_ha_state()
+        result = await self._ecu.set_inverter_max_power(self._uid, value)
+        if result is None:
+            # Replaced by a later value before it was sent
+            return
+        if result:
+            self._accepted_value = value
+            return
+        _LOGGER.warning(
+            "ECU did not accept max power %s for inverter %s", value, self._uid
+        )
+        if self._attr_native_value == value:
+            self._attr_native_value = self._accepted_value
+            self.async_write_ha_state()
 
     def set_native_value(self, value: float):
         """Set the value synchronously (required by NumberEntity)."""
@@ -84,6 +102,7 @@ class InverterMaxPwrNumber(CoordinatorEntity, RestoreNumber):
         await super().async_added_to_hass()
         if (last_state := await self.async_get_last_state()) is not None:
             self._attr_native_value = float(last_state.state)
+            self._accepted_value = self._attr_native_value
 
 
 class ECUPowerLimitNumber(CoordinatorEntity, RestoreNumber):
@@ -91,7 +110,7 @@ class ECUPowerLimitNumber(CoordinatorEntity, RestoreNumber):
 
     def __init__(self, coordinator, ecu):
         """Initialize the number entity."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=AVAILABILITY_CONTEXT)
         self._ecu = ecu
         self._attr_name = f"ECU {ecu.ecu.ecu_id} Power Limit"
         self._attr_unique_id = f"{ecu.ecu.ecu_id}_power_limit"
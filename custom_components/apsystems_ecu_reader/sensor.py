@@ -21,6 +21,7 @@ from homeassistant.const import (
     UnitOfTemperature,
     UnitOfElectricPotential,
     UnitOfFrequency,
+    UnitOfTime,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT as dBm,
 )
 
@@ -37,8 +38,13 @@ from .const import (
     FROM_GRID_ICON,
     CONSUMED_ICON,
     DOWNLOAD_ICON,
+    LOCK_WAIT_ICON,
+    DEADLINE_ICON,
+    LATENCY_ICON,
+    LATENCY_PHASES,
     INVERTER_MODEL_MAP,
 )
+from .ecu_inverters import InverterFleet, data_context
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -91,6 +97,26 @@ async def async_setup_entry(hass, config_entry, add_entities):
             icon=SOLAR_ICON,
             stateclass=SensorStateClass.MEASUREMENT,
         ),
+        APsystemsECUSensor(
+            coordinator,
+            ecu,
+            "fleet_power",
+            label=f"{ecu.ecu.ecu_id} Inverter Power Total",
+            unit=UnitOfPower.WATT,
+            devclass=SensorDeviceClass.POWER,
+            icon=SOLAR_PANEL_ICON,
+            stateclass=SensorStateClass.MEASUREMENT,
+        ),
+        APsystemsECUSensor(
+            coordinator,
+            ecu,
+            "fleet_temperature_max",
+            label=f"{ecu.ecu.ecu_id} Inverter Temperature Max",
+            unit=UnitOfTemperature.CELSIUS,
+            devclass=SensorDeviceClass.TEMPERATURE,
+            stateclass=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
         APsystemsECUSensor(
             coordinator,
             ecu,
@@ -115,6 +141,36 @@ async def async_setup_entry(hass, config_entry, add_entities):
             icon=CACHE_COUNTER_ICON,
             entity_category=EntityCategory.DIAGNOSTIC,
         ),
+        APsystemsECUSensor(
+            coordinator,
+            ecu,
+            "lock_wait_time",
+            label=f"{ecu.ecu.ecu_id} Query Slot Wait Time",
+            unit=UnitOfTime.SECONDS,
+            devclass=SensorDeviceClass.DURATION,
+            icon=LOCK_WAIT_ICON,
+            stateclass=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+        APsystemsECUSensor(
+            coordinator,
+            ecu,
+            "deadline_phase",
+            label=f"{ecu.ecu.ecu_id} Cycle Deadline Phase",
+            icon=DEADLINE_ICON,
+            entity_category=EntityCategory.DIAGNOSTIC,
+        ),
+        *[
+            APsystemsECULatencySensor(
+                coordinator,
+                ecu,
+                phase,
+                label=f"{ecu.ecu.ecu_id} {label}",
+            )
+            for phase, label in LATENCY_PHASES.items()
+            # The meter is only queried on ECU-C models
+            if phase != "meter" or ecu.ecu.ecu_id.startswith("215")
+        ],
         APsystemsECUFirmwareSensor(
             coordinator,
             ecu,
@@ -343,7 +399,7 @@ class APsystemsECUInverterBinarySensor(CoordinatorEntity, BinarySensorEntity):
 
     def __init__(self, coordinator, ecu, uid, inv_data):
 
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=data_context((uid, "online")))
         self.coordinator = coordinator
         self._ecu = ecu
         self._uid = uid
@@ -364,13 +420,6 @@ class APsystemsECUInverterBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Return custom state for activity log."""
         return "true" if self.is_on else "false"
 
-    async def async_added_to_hass(self):
-        """Handle entity which will be added."""
-        await super().async_added_to_hass()
-        self.async_on_remove(
-            self.coordinator.async_add_listener(self._handle_coordinator_update)
-        )
-
     @property
     def unique_id(self):
         """Return the unique id of the binary sensor."""
@@ -451,7 +500,7 @@ class APsystemsECUInverterSensor(CoordinatorEntity, SensorEntity):
         entity_category=None,
     ):
 
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=data_context((uid, field)))
         self.coordinator = coordinator
         self._index = index
         self._uid = uid
@@ -486,26 +535,10 @@ class APsystemsECUInverterSensor(CoordinatorEntity, SensorEntity):
     def native_value(self):
         """Return the state of the sensor."""
         # _LOGGER.debug("State called for %s", self._field)
-        if self._field == "voltage":
-            # _LOGGER.debug("VOLTAGE  %s %s", self._uid, self._index)
-            return (
-                self.coordinator.data.get("inverters", {})
-                .get(self._uid, {})
-                .get("voltage", [])[self._index]
-            )
-        elif self._field == "power":
-            # _LOGGER.debug("POWER  %s %s", self._uid, self._index)
-            return (
-                self.coordinator.data.get("inverters", {})
-                .get(self._uid, {})
-                .get("power", [])[self._index]
-            )
-        else:
-            return (
-                self.coordinator.data.get("inverters", {})
-                .get(self._uid, {})
-                .get(self._field)
-            )
+        inverters = self.coordinator.data.get("inverters", InverterFleet())
+        if self._field in ("voltage", "power"):
+            return inverters.value(self._uid, self._field, self._index)
+        return inverters.value(self._uid, self._field)
 
     @property
     def icon(self):
@@ -556,8 +589,14 @@ class APsystemsECUSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
         stateclass=None,
         entity_category=None,
         #    disabled_by=None,
+        context=None,
     ):
-        super().__init__(coordinator)
+        # The lifetime maximum follows the current power
+        if context is None:
+            context = data_context(
+                "current_power" if field == "lifetime_maximum_power" else field
+            )
+        super().__init__(coordinator, context=context)
         self.coordinator = coordinator
         self._ecu = ecu
         self._field = field
@@ -642,6 +681,44 @@ class APsystemsECUSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
         return self._entity_category
 
 
+class APsystemsECULatencySensor(APsystemsECUSensor):
+    """Latency of one phase of the update cycle, the last sample in ms."""
+
+    def __init__(self, coordinator, ecu, phase, label=None):
+        super().__init__(
+            coordinator,
+            ecu,
+            f"latency_{phase}",
+            label=label,
+            icon=LATENCY_ICON,
+            unit=UnitOfTime.MILLISECONDS,
+            devclass=SensorDeviceClass.DURATION,
+            stateclass=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            context="latency",
+        )
+        self._phase = phase
+
+    def _stats(self):
+        return self.coordinator.data.get("latency", {}).get(self._phase, {})
+
+    @property
+    def native_value(self):
+        """Return the latency of the last cycle."""
+        return self._stats().get("last")
+
+    @property
+    def extra_state_attributes(self):
+        """Return the rolling statistics of this phase."""
+        stats = self._stats()
+        return {
+            "mean": stats.get("mean"),
+            "p95": stats.get("p95"),
+            "max": stats.get("max"),
+            "samples": stats.get("count", 0),
+        }
+
+
 class APsystemsECUFirmwareSensor(CoordinatorEntity, SensorEntity, RestoreEntity):
     """Representation of the ECU firmware version sensor."""
 
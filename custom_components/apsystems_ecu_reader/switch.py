@@ -3,11 +3,18 @@
 import logging
 
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, POWER_ICON, ECU_MODEL_MAP, INVERTER_MODEL_MAP
+from .const import (
+    DOMAIN,
+    POWER_ICON,
+    ECU_MODEL_MAP,
+    INVERTER_MODEL_MAP,
+    AVAILABILITY_CONTEXT,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,7 +46,7 @@ class APsystemsBaseSwitch(CoordinatorEntity, SwitchEntity, RestoreEntity):
 
     def __init__(self, coordinator, ecu, name, unique_id, icon, entity_category=None):
         """Initialize the base switch."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=AVAILABILITY_CONTEXT)
         self.coordinator = coordinator
         self._ecu = ecu
         self._name = name
@@ -146,17 +153,27 @@ class APsystemsECUInverterSwitch(APsystemsBaseSwitch):
             "via_device": (DOMAIN, f"ecu_{self._ecu.ecu.ecu_id}"),
         }
 
+    async def async_added_to_hass(self):
+        """Follow the states set by the switches and the service."""
+        await super().async_added_to_hass()
+        self._ecu.inverter_state_listeners[self._uid] = self._inverter_state_set
+        self.async_on_remove(
+            lambda: self._ecu.inverter_state_listeners.pop(self._uid, None)
+        )
+
+    @callback
+    def _inverter_state_set(self, state):
+        """Show the state the ECU accepted for this inverter."""
+        self._state = state
+        self.async_write_ha_state()
+
     async def async_turn_off(self, **kwargs):
-        """Turn off the inverter switch."""
-        if await self._ecu.set_inverter_state(self._uid, False):
-            self._state = False
-            self.async_write_ha_state()
+        """Turn off the inverter switch, batched with concurrent toggles."""
+        await self._ecu.set_inverter_state(self._uid, False)
 
     async def async_turn_on(self, **kwargs):
-        """Turn on the inverter switch."""
-        if await self._ecu.set_inverter_state(self._uid, True):
-            self._state = True
-            self.async_write_ha_state()
+        """Turn on the inverter switch, batched with concurrent toggles."""
+        await self._ecu.set_inverter_state(self._uid, True)
 
 
 class APsystemsZeroExportSwitch(APsystemsBaseSwitch):
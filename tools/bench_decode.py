@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmark of the frame field decoders.
+
+Decodes every field of a synthetic inverter frame once with the slicing
+aps_* helpers and once with FrameView, and times the full inverter parse.
+Requires Home Assistant to be importable (run it from an HA dev environment):
+
+    python tools/bench_decode.py --fleet-size 450 --repeat 200
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+from ecu_frames import INVERTER_RECORD_SIZE, inverter_frame, make_fleet, signal_frame
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.apsystems_ecu_reader.ecu_api import (  # noqa: E402
+    APsystemsSocket,
+)
+from custom_components.apsystems_ecu_reader.ecu_helpers import (  # noqa: E402
+    FrameView,
+    aps_int_from_bytes,
+    aps_str,
+    aps_uid,
+)
+
+# The 4 digit length field limits a frame to 9999 bytes, about 450 inverters
+TYPE_MIX = {"01": 8, "03": 1, "04": 1}
+
+
+def record_offsets(data):
+    """Return (start, record size) of every inverter record in the frame."""
+    offsets = []
+    start = 26
+    for _ in range(int.from_bytes(data[17:19], "big")):
+        size = INVERTER_RECORD_SIZE[data[start + 7 : start + 9].decode()]
+        offsets.append((start, size))
+        start += size
+    return offsets
+
+
+def decode_sliced(data, offsets):
+    """Decode all fields with the aps_* helpers, each field is a copy."""
+    for start, size in offsets:
+        aps_uid(data, start)
+        aps_int_from_bytes(data, start + 6, 1)
+        aps_str(data, start + 7, 2)
+        for field in range(start + 9, start + size, 2):
+            aps_int_from_bytes(data, field, 2)
+
+
+def decode_view(data, offsets):
+    """Decode all fields in place with FrameView."""
+    frame = FrameView(data)
+    for start, size in offsets:
+        frame.uid(start)
+        frame.integer(start + 6, 1)
+        frame.string(start + 7, 2)
+        for field in range(start + 9, start + size, 2):
+            frame.integer(field, 2)
+
+
+def main():
+    """Run the benchmark and print the time per frame."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fleet-size", type=int, default=450)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    fleet = make_fleet(args.fleet_size, TYPE_MIX, seed=1)
+    data = inverter_frame(fleet)
+    offsets = record_offsets(data)
+    ecu = APsystemsSocket("bench")
+    ecu.inverter_raw_data = data
+    ecu.signal_raw_data = signal_frame(fleet)
+    ecu.qty_of_inverters = len(fleet)
+
+    print(f"inverters: {len(fleet)}  frame size: {len(data)} bytes")
+    for label, call in (
+        ("aps_* slicing", lambda: decode_sliced(data, offsets)),
+        ("FrameView", lambda: decode_view(data, offsets)),
+        ("process_inverter_data", lambda: ecu.process_inverter_data(True)),
+    ):
+        best = min(timeit.repeat(call, number=args.repeat, repeat=5)) / args.repeat
+        print(f"{label:>22}: {best * 1e6:9.1f} us per frame")
+
+
+if __name__ == "__main__":
+    main()
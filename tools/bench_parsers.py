@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""Benchmark of the frame parsers over every documented frame layout.
+
+Runs validate_data, process_ecu_data, process_signal_data and
+process_inverter_data on the frames of ecu_frames.layout_frames() and prints
+the time and the memory allocated per inverter. Fleet sizes that do not fit
+the 9999 byte frame of a layout are skipped. Requires Home Assistant to be
+importable (run it from an HA dev environment):
+
+    python tools/bench_parsers.py --sizes 1,10,100,450,1000 --repeat 50
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from ecu_frames import layout_frames
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.apsystems_ecu_reader.ecu_api import (  # noqa: E402
+    APsystemsSocket,
+)
+from custom_components.apsystems_ecu_reader.ecu_helpers import (  # noqa: E402
+    validate_data,
+)
+
+
+def parsers(frames):
+    """Return the parse calls of one set of frames, by name."""
+    ecu = APsystemsSocket("bench")
+    ecu.ecu_raw_data = frames["ecu"]
+    ecu.inverter_raw_data = frames["inverter"]
+    ecu.signal_raw_data = frames["signal"]
+    # The signal and inverter parsers depend on the inverter count
+    ecu.process_ecu_data()
+    return {
+        "validate_data": lambda: validate_data(frames["inverter"], "Inverter Query"),
+        "process_ecu_data": ecu.process_ecu_data,
+        "process_signal_data": ecu.process_signal_data,
+        "process_inverter_data": lambda: ecu.process_inverter_data(True),
+    }
+
+
+def allocated(call):
+    """Return the peak number of bytes allocated during one call."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        call()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    """Run the benchmark and print one line per layout, size and parser."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,450,1000")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--layout", default="", help="only layouts containing this")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(
+        f"{'layout':<24}{'size':>6}  {'parser':<22}"
+        f"{'ns/inverter':>12}{'B/inverter':>12}"
+    )
+    for frames in layout_frames(sizes, args.seed):
+        if args.layout not in frames["name"]:
+            continue
+        for name, call in parsers(frames).items():
+            # Warm up, later cycles reuse the unchanged inverter records
+            call()
+            best = min(timeit.repeat(call, number=args.repeat, repeat=5))
+            per_call = best / args.repeat * 1e9
+            print(
+                f"{frames['name']:<24}{frames['size']:>6}  {name:<22}"
+                f"{per_call / frames['size']:>12.0f}"
+                f"{allocated(call) / frames['size']:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
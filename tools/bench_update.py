@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""Benchmark full ECU update cycles against the local simulator.
+
+Starts a SimulatedECU in-process and runs ECUREADER.update against it, which
+requires Home Assistant to be importable (run it from an HA dev environment):
+
+    python tools/bench_update.py --fleet-size 300 --cycles 20 --segment-size 512
+"""
+
+import argparse
+import asyncio
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from ecu_simulator import build_parser as simulator_parser, ecus_from_args, serve
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.apsystems_ecu_reader import ECUREADER  # noqa: E402
+
+
+async def run(args):
+    """Run the benchmark and print a per-cycle summary."""
+    ecus = ecus_from_args(args)
+    servers = await serve(ecus, args.http_port)
+    readers = [ECUREADER(host, "ECU-local", "default", True) for host in ecus]
+    durations = []
+    from_cache = 0
+    try:
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(ecu.update(args.port_retries, 99, True) for ecu in readers)
+            )
+            durations.append(time.perf_counter() - start)
+            from_cache += sum(bool(data.get("data_from_cache")) for data in results)
+    finally:
+        for reader in readers:
+            await reader.ecu.close_gui_session()
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+
+    durations.sort()
+    # nearest-rank 95th percentile
+    p95 = durations[math.ceil(0.95 * len(durations)) - 1]
+    print(f"ECUs: {len(readers)}  inverters per ECU: {args.fleet_size}")
+    print(f"cycles: {args.cycles}  served from cache: {from_cache}")
+    print(
+        f"cycle time ms: mean {statistics.mean(durations) * 1000:.1f}  "
+        f"p95 {p95 * 1000:.1f}  "
+        f"max {durations[-1] * 1000:.1f}"
+    )
+    for ecu in ecus.values():
+        print(f"ECU {ecu.ecu_id} stats: {ecu.stats}")
+
+
+def main():
+    """Parse options shared with the simulator plus benchmark settings."""
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        parents=[simulator_parser()],
+        add_help=False,
+    )
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--port-retries", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
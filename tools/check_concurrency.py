@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""Check the concurrency limits of the update cycle.
+
+Runs update cycles against a saturated ECU concurrency budget and checks
+that the wait for a query slot keeps within the cycle deadline, and
+cancels a write queue during a flush and checks that no caller is left
+waiting. Prints one line per check and exits with 1 when one fails.
+Requires Home Assistant to be importable (run it from an HA dev
+environment):
+
+    python tools/check_concurrency.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.apsystems_ecu_reader.ecu_api import (  # noqa: E402
+    ECU_BUDGET,
+    APsystemsDeadlineExceeded,
+    APsystemsSocket,
+)
+from custom_components.apsystems_ecu_reader.ecu_writes import WriteQueue  # noqa: E402
+
+# Cycle deadline of the checks in seconds and the tolerated overrun
+DEADLINE = 0.3
+SLACK = 0.1
+
+
+async def saturated_cycle(held_host, host):
+    """
+    Hold the only slot of the budget for held_host and run an update cycle
+    of host with a deadline. Return the error of the cycle, its duration
+    and whether the budget is free again afterwards.
+    """
+    await ECU_BUDGET.set_limit(1)
+    await ECU_BUDGET.acquire(held_host)
+    ecu = APsystemsSocket(host)
+    start = time.monotonic()
+    try:
+        await ecu.get_update(1, True, deadline=DEADLINE)
+        error = None
+    except APsystemsDeadlineExceeded as err:
+        error = err
+    duration = time.monotonic() - start
+    await ECU_BUDGET.release(held_host)
+    free = ECU_BUDGET.in_flight == 0 and not ECU_BUDGET.host_lock(host).locked()
+    return error, duration, ecu.deadline_phase, free
+
+
+async def cancelled_flush():
+    """
+    Cancel a write queue while it sends a batch, with a second batch
+    waiting behind it. Return the results its callers got, None for a
+    caller still waiting after the deadline.
+    """
+    sending = asyncio.Event()
+
+    async def flush(values):
+        sending.set()
+        await asyncio.Event().wait()
+
+    queue = WriteQueue(flush, 0.01)
+    sent = [asyncio.create_task(queue.submit(key, True)) for key in ("a", "b")]
+    await sending.wait()
+    queued = asyncio.create_task(queue.submit("c", True))
+    await asyncio.sleep(0.05)
+    queue.cancel()
+    await asyncio.wait([*sent, queued], timeout=DEADLINE)
+    return [task.result() if task.done() else None for task in (*sent, queued)]
+
+
+async def run():
+    """Run every check and return the number of failures."""
+    failures = 0
+    cases = {
+        "budget held by another ECU": ("192.0.2.1", "192.0.2.2"),
+        "host lock held by a cycle of the same ECU": ("192.0.2.3", "192.0.2.3"),
+    }
+    for name, hosts in cases.items():
+        error, duration, phase, free = await saturated_cycle(*hosts)
+        ok = (
+            error is not None
+            and error.phase == "slot"
+            and phase == "slot"
+            and duration <= DEADLINE + SLACK
+            and free
+        )
+        failures += not ok
+        print(
+            f"{'ok' if ok else 'FAIL':>4}  {name}: {error}, "
+            f"{duration * 1000:.0f} ms, budget free: {free}"
+        )
+
+    results = await cancelled_flush()
+    ok = results == [False, False, False]
+    failures += not ok
+    print(
+        f"{'ok' if ok else 'FAIL':>4}  write queue cancelled during a flush: {results}"
+    )
+    return failures
+
+
+def main():
+    """Run the checks and exit with 1 when one failed."""
+    sys.exit(1 if asyncio.run(run()) else 0)
+
+
+if __name__ == "__main__":
+    main()
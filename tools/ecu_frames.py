@@ -0,0 +1,192 @@
+"""Builders for synthetic ECU response frames.
+
+The layouts mirror what ecu_api.py decodes, so the frames produced here can be
+fed straight into APsystemsSocket or served by the simulator.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import random
+
+# Record sizes per inverter type code, see INVERTER_LAYOUTS in ecu_helpers.py
+INVERTER_RECORD_SIZE = {"01": 21, "02": 27, "03": 23, "04": 21, "05": 27}
+UNKNOWN_RECORD_SIZE = 9
+
+# UID prefix (model family) used for every inverter type code
+INVERTER_UID_PREFIX = {"01": "40", "02": "50", "03": "80", "04": "70", "05": "90"}
+
+# Type mixes covering every inverter record layout, "07" is an unknown type
+TYPE_MIXES = {
+    "yc600": {"01": 1},
+    "ds3": {"04": 1},
+    "yc1000": {"02": 1},
+    "qt2": {"05": 1},
+    "qs1": {"03": 1},
+    "unknown": {"07": 1},
+    "mixed": {"01": 4, "02": 1, "03": 2, "04": 2, "05": 1, "07": 1},
+}
+
+# Bytes of an inverter frame besides the records: header, 26 byte prefix, END
+INVERTER_FRAME_OVERHEAD = 26 + 4
+
+
+@dataclass
+class SimInverter:
+    """State of one simulated inverter."""
+
+    uid: str
+    type_code: str
+    online: bool = True
+    frequency: float = 50.0
+    temperature: int = 35
+    power: list = field(default_factory=list)
+    voltage: list = field(default_factory=list)
+    signal: int = 200
+    max_power: int = 500
+    enabled: bool = True
+
+
+def make_fleet(size, type_mix=None, seed=None):
+    """Create a fleet of inverters, type_mix maps type code to a weight."""
+    rnd = random.Random(seed)
+    type_mix = type_mix or {"01": 1}
+    codes = list(type_mix)
+    weights = [type_mix[code] for code in codes]
+    fleet = []
+    for index in range(size):
+        code = rnd.choices(codes, weights)[0]
+        prefix = INVERTER_UID_PREFIX.get(code, "40")
+        fleet.append(
+            SimInverter(
+                uid=f"{prefix}{index:010d}",
+                type_code=code,
+                signal=rnd.randint(80, 255),
+            )
+        )
+    return fleet
+
+
+def add_readings(fleet, seed=None, offline=0.1):
+    """Give a fleet random power, voltage, temperature and online values."""
+    rnd = random.Random(seed)
+    for inv in fleet:
+        inv.online = rnd.random() >= offline
+        inv.frequency = round(rnd.uniform(49.8, 50.2), 1)
+        inv.temperature = rnd.randint(-20, 80)
+        inv.power = [rnd.randint(0, 450) for _ in range(4)]
+        inv.voltage = [rnd.randint(220, 245) for _ in range(3)]
+    return fleet
+
+
+def fleet_capacity(type_mix):
+    """Return how many inverters of the largest type in type_mix fit a frame."""
+    largest = max(
+        INVERTER_RECORD_SIZE.get(code, UNKNOWN_RECORD_SIZE) for code in type_mix
+    )
+    return (9999 - INVERTER_FRAME_OVERHEAD) // largest
+
+
+def layout_frames(sizes, seed=0):
+    """
+    Yield a dict of frames for every layout: both ECU types, every type mix
+    and replaced inverters, for every fleet size that fits a frame. The
+    result is the same for the same sizes and seed.
+    """
+    moment = datetime(2024, 6, 1, 12, 30, 15)
+    for mix_name, type_mix in TYPE_MIXES.items():
+        for size in sizes:
+            if size > fleet_capacity(type_mix):
+                continue
+            fleet = add_readings(make_fleet(size, type_mix, seed), seed)
+            for ecu_type in ("01", "02"):
+                for replaced in (False, True):
+                    yield {
+                        "name": f"{mix_name} ecu{ecu_type}"
+                        + (" replaced" if replaced else ""),
+                        "size": size,
+                        "fleet": fleet,
+                        "ecu": ecu_frame(
+                            "216000001234", fleet, ecu_type, moment=moment
+                        ),
+                        "inverter": inverter_frame(fleet, moment, replaced),
+                        "signal": signal_frame(fleet),
+                    }
+
+
+def bcd_timestamp(moment: datetime) -> bytes:
+    """Encode a datetime the way the ECU does (hex digits read as decimal)."""
+    return bytes.fromhex(moment.strftime("%Y%m%d%H%M%S"))
+
+
+def frame(body: bytes) -> bytes:
+    """Wrap a body (everything after the length field) into a complete frame."""
+    length = 5 + 4 + len(body) + 3
+    if length > 9999:
+        raise ValueError(f"frame of {length} bytes does not fit the length field")
+    return b"APS11" + f"{length:04d}".encode() + body + b"END\n"
+
+
+def ecu_frame(
+    ecu_id,
+    fleet,
+    ecu_type="01",
+    lifetime_energy=12345.6,
+    today_energy=12.34,
+    firmware="ECU_R_1.2.22",
+    timezone="Etc/GMT-1",
+    moment=None,
+):
+    """Build the response to the APS1100160001 ECU base query."""
+    moment = moment or datetime.now()
+    online = [inv for inv in fleet if inv.online]
+    current_power = sum(sum(p or 0 for p in inv.power) for inv in online)
+    body = b"0001" + ecu_id.encode() + ecu_type.encode()
+    body += int(lifetime_energy * 10).to_bytes(4, "big")
+    body += int(current_power).to_bytes(4, "big")
+    body += int(today_energy * 100).to_bytes(4, "big")
+    if ecu_type == "01":
+        body += bcd_timestamp(moment)
+        body += len(fleet).to_bytes(2, "big") + len(online).to_bytes(2, "big")
+        body += b"10" + f"{len(firmware):03d}".encode() + firmware.encode()
+        body += f"{len(timezone):03d}".encode() + timezone.encode()
+    else:
+        body += len(fleet).to_bytes(2, "big") + len(online).to_bytes(2, "big")
+        body += b"\x00" * 6 + f"{len(firmware):03d}".encode() + firmware.encode()
+    return frame(body)
+
+
+def inverter_record(inv: SimInverter) -> bytes:
+    """Encode one inverter record for the 0002 inverter query."""
+    record = bytes.fromhex(inv.uid) + bytes([inv.online]) + inv.type_code.encode()
+    if inv.type_code not in INVERTER_RECORD_SIZE:
+        return record
+    record += int(inv.frequency * 10).to_bytes(2, "big")
+    record += int(inv.temperature + 100).to_bytes(2, "big")
+    power = [int(p or 0) for p in inv.power] + [0] * 4
+    voltage = [int(v or 0) for v in inv.voltage] + [0] * 4
+    if inv.type_code in ("01", "04"):
+        values = [power[0], voltage[0], power[1], voltage[1]]
+    elif inv.type_code in ("02", "05"):
+        values = [power[0], voltage[0], power[1], voltage[1], power[2], voltage[2]]
+        values.append(power[3])
+    else:
+        values = [power[0], voltage[0], power[1], power[2], power[3]]
+    for value in values:
+        record += value.to_bytes(2, "big")
+    return record
+
+
+def inverter_frame(fleet, moment=None, replaced=False):
+    """Build the response to the APS1100280002 inverter query."""
+    moment = moment or datetime.now()
+    body = b"0002" + (b"0002" if replaced else b"0001")
+    body += len(fleet).to_bytes(2, "big") + bcd_timestamp(moment)
+    body += b"".join(inverter_record(inv) for inv in fleet)
+    return frame(body)
+
+
+def signal_frame(fleet):
+    """Build the response to the APS1100280030 signal query."""
+    body = b"0030" + b"00"
+    body += b"".join(bytes.fromhex(inv.uid) + bytes([inv.signal]) for inv in fleet)
+    return frame(body)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+
+"""Local APsystems ECU simulator for benchmarking and soak testing.
+
+Serves the ECU socket protocol on port 8899 (base, inverter and signal
+queries) and the web UI endpoints used by gui_helpers.py. Every simulated ECU
+binds its own address, so several ECUs can run side by side on the loopback
+range, for example:
+
+    python tools/ecu_simulator.py --host 127.0.0.2 --host 127.0.0.3 \\
+        --fleet-size 120 --type-mix 01:3,03:1 --latency 0.2 --jitter 0.1
+
+Only the Python standard library is needed.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+import json
+import logging
+import math
+import random
+import time
+from urllib.parse import parse_qs
+
+from ecu_frames import ecu_frame, inverter_frame, make_fleet, signal_frame
+
+_LOGGER = logging.getLogger("ecu_simulator")
+
+ECU_PORT = 8899
+ECU_CMD = b"APS1100160001"
+INVERTER_CMD = b"APS1100280002"
+SIGNAL_CMD = b"APS1100280030"
+
+
+def compact_json(value):
+    """Serialise like the ECU's PHP backend, without whitespace."""
+    return json.dumps(value, separators=(",", ":"))
+
+
+class SimulatedECU:
+    """One simulated ECU with its inverter fleet and fault settings."""
+
+    def __init__(
+        self,
+        ecu_id="216200001234",
+        fleet_size=8,
+        type_mix=None,
+        ecu_type="01",
+        refresh_interval=300,
+        latency=0.0,
+        jitter=0.0,
+        drop_rate=0.0,
+        partial_rate=0.0,
+        segment_size=0,
+        timezone="Etc/GMT-1",
+        night=False,
+        seed=None,
+    ):
+        self.ecu_id = ecu_id
+        self.ecu_type = ecu_type
+        self.refresh_interval = refresh_interval
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.partial_rate = partial_rate
+        self.segment_size = segment_size
+        self.timezone = timezone
+        self.night = night
+        self.fleet = make_fleet(fleet_size, type_mix, seed)
+        self.random = random.Random(seed)
+        self.lifetime_energy = 12345.6
+        self.today_energy = 0.0
+        self.refreshed_at = None
+        self.refresh_moment = None
+        self.rebooting_until = 0.0
+        self.meter_series = {"power1": [], "power2": []}
+        self.stats = {"queries": 0, "dropped": 0, "partial": 0, "http": 0}
+        self.refresh()
+
+    def refresh(self):
+        """Produce a new data cycle, like the ECU does every few minutes."""
+        self.refreshed_at = time.monotonic()
+        self.refresh_moment = datetime.now().replace(microsecond=0)
+        hour = self.refresh_moment.hour + self.refresh_moment.minute / 60
+        sun = 0.0 if self.night else max(0.0, math.sin((hour - 6) / 12 * math.pi))
+        total = 0
+        for inv in self.fleet:
+            inv.online = sun > 0 and inv.enabled
+            channels = 2 if inv.type_code in ("01", "04") else 4
+            if inv.online:
+                limit = min(inv.max_power, 500)
+                inv.power = [
+                    int(limit * sun * self.random.uniform(0.8, 1.0))
+                    for _ in range(channels)
+                ]
+                inv.voltage = [self.random.randint(228, 242) for _ in range(3)]
+                inv.frequency = round(self.random.uniform(49.9, 50.1), 1)
+                inv.temperature = int(20 + 30 * sun)
+                total += sum(inv.power)
+            else:
+                inv.power = [0] * channels
+                inv.voltage = [0, 0, 0]
+        self.today_energy += total * self.refresh_interval / 3600 / 1000
+        self.lifetime_energy += total * self.refresh_interval / 3600 / 1000
+        sample = {"time": self.refresh_moment.strftime("%Y-%m-%d %H:%M:%S")}
+        per_phase = total // 3
+        self.meter_series["power1"].append(
+            {**sample, "powerA": per_phase, "powerB": per_phase, "powerC": per_phase}
+        )
+        self.meter_series["power2"].append(
+            {**sample, "powerA": 300 - per_phase, "powerB": 0, "powerC": 0}
+        )
+
+    def maybe_refresh(self):
+        """Refresh the data when the refresh interval has passed."""
+        if time.monotonic() - self.refreshed_at >= self.refresh_interval:
+            self.refresh()
+
+    def response_for(self, command: bytes):
+        """Return the frame answering a socket command, None if unknown."""
+        self.maybe_refresh()
+        if command.startswith(ECU_CMD):
+            return ecu_frame(
+                self.ecu_id,
+                self.fleet,
+                ecu_type=self.ecu_type,
+                lifetime_energy=self.lifetime_energy,
+                today_energy=self.today_energy,
+                timezone=self.timezone,
+                moment=self.refresh_moment,
+            )
+        if command.startswith(INVERTER_CMD):
+            return inverter_frame(self.fleet, moment=self.refresh_moment)
+        if command.startswith(SIGNAL_CMD):
+            return signal_frame(self.fleet)
+        return None
+
+    async def delay(self):
+        """Sleep for the configured latency plus jitter."""
+        pause = self.latency + self.random.uniform(0, self.jitter)
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async def handle_socket(self, reader, writer):
+        """Serve ECU socket commands until the client disconnects."""
+        try:
+            while not reader.at_eof():
+                command = await reader.readline()
+                if not command:
+                    break
+                self.stats["queries"] += 1
+                if time.monotonic() < self.rebooting_until:
+                    break
+                if self.random.random() < self.drop_rate:
+                    self.stats["dropped"] += 1
+                    break
+                response = self.response_for(command.strip())
+                if response is None:
+                    continue
+                await self.delay()
+                if self.random.random() < self.partial_rate:
+                    self.stats["partial"] += 1
+                    response = response[: self.random.randint(1, len(response) - 1)]
+                await self.send_segmented(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def send_segmented(self, writer, response):
+        """Write a response, optionally split over several TCP segments."""
+        size = self.segment_size or len(response)
+        for start in range(0, len(response), size):
+            writer.write(response[start : start + size])
+            await writer.drain()
+            if start + size < len(response):
+                await self.delay()
+
+    def handle_http(self, method, path, form):
+        """Return status and body for a web UI request."""
+        self.stats["http"] += 1
+        if path.endswith("/index.php/meter/old_meter_power_graph"):
+            self.maybe_refresh()
+            return 200, compact_json(self.meter_series)
+        if (
+            path.endswith("/index.php/configuration/set_switch_state")
+            and method == "POST"
+        ):
+            by_uid = {inv.uid: inv for inv in self.fleet}
+            for item in form.get("ids[]", []):
+                if item[:-1] in by_uid:
+                    by_uid[item[:-1]].enabled = item.endswith("1")
+            return 200, compact_json(
+                {"value": 0, "message": "See the results 5 minutes later !"}
+            )
+        if path.endswith("/index.php/configuration/set_maxpower") and method == "POST":
+            by_uid = {inv.uid: inv for inv in self.fleet}
+            uid = form.get("id", [""])[0]
+            if uid in by_uid:
+                by_uid[uid].max_power = int(float(form.get("maxpower", ["500"])[0]))
+                return 200, compact_json({"value": 0, "message": "Set successfully"})
+            return 200, compact_json({"value": 1, "message": "Inverter not found"})
+        if (
+            path.endswith("/index.php/meter/set_meter_display_funcs")
+            and method == "POST"
+        ):
+            return 200, compact_json({"value": 0, "message": "Set successfully"})
+        if path.endswith("/index.php/management/set_wlan_ap") and method == "POST":
+            self.rebooting_until = time.monotonic() + 30
+            return 200, '{"value":0}'
+        return 404, compact_json({"value": 1, "message": "Not found"})
+
+    async def handle_web(self, reader, writer):
+        """Minimal HTTP/1.1 server for the web UI endpoints (keep-alive aware)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = b""
+                if length := int(headers.get("content-length", 0)):
+                    body = await reader.readexactly(length)
+                form = parse_qs(body.decode("utf-8"))
+                await self.delay()
+                status, text = self.handle_http(method, path, form)
+                payload = text.encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                reason = "OK" if status == 200 else "Not Found"
+                connection = "keep-alive" if keep_alive else "close"
+                head = (
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {connection}\r\n\r\n"
+                )
+                writer.write(head.encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(ecus, http_port):
+    """Start the socket and web servers for every simulated ECU."""
+    servers = []
+    for host, ecu in ecus.items():
+        servers.append(await asyncio.start_server(ecu.handle_socket, host, ECU_PORT))
+        servers.append(await asyncio.start_server(ecu.handle_web, host, http_port))
+        _LOGGER.info(
+            "ECU %s with %s inverters on %s (socket %s, http %s)",
+            ecu.ecu_id,
+            len(ecu.fleet),
+            host,
+            ECU_PORT,
+            http_port,
+        )
+    return servers
+
+
+def parse_type_mix(value):
+    """Parse '01:3,03:1' into {'01': 3, '03': 1}."""
+    mix = {}
+    for item in value.split(","):
+        code, _, weight = item.partition(":")
+        mix[code.strip().zfill(2)] = float(weight or 1)
+    return mix
+
+
+def build_parser():
+    """Command line options of the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", action="append", help="address to bind (repeatable)")
+    parser.add_argument("--http-port", type=int, default=80)
+    parser.add_argument("--ecu-id", default="216200001234", help="first ECU ID")
+    parser.add_argument("--ecu-type", default="01", choices=["01", "02"])
+    parser.add_argument("--fleet-size", type=int, default=8)
+    parser.add_argument("--type-mix", type=parse_type_mix, default={"01": 1})
+    parser.add_argument("--refresh-interval", type=float, default=300)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="0..1")
+    parser.add_argument("--partial-rate", type=float, default=0.0, help="0..1")
+    parser.add_argument("--segment-size", type=int, default=0, help="bytes")
+    parser.add_argument("--timezone", default="Etc/GMT-1")
+    parser.add_argument("--night", action="store_true", help="all inverters offline")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def ecus_from_args(args):
+    """Create one SimulatedECU per host from the parsed options."""
+    ecus = {}
+    for index, host in enumerate(args.host or ["127.0.0.1"]):
+        ecus[host] = SimulatedECU(
+            ecu_id=f"{int(args.ecu_id) + index:012d}",
+            fleet_size=args.fleet_size,
+            type_mix=args.type_mix,
+            ecu_type=args.ecu_type,
+            refresh_interval=args.refresh_interval,
+            latency=args.latency,
+            jitter=args.jitter,
+            drop_rate=args.drop_rate,
+            partial_rate=args.partial_rate,
+            segment_size=args.segment_size,
+            timezone=args.timezone,
+            night=args.night,
+            seed=None if args.seed is None else args.seed + index,
+        )
+    return ecus
+
+
+async def main():
+    """Run the simulator until interrupted."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    args = build_parser().parse_args()
+    ecus = ecus_from_args(args)
+    servers = await serve(ecus, args.http_port)
+    try:
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+    finally:
+        for ecu in ecus.values():
+            _LOGGER.info("ECU %s stats: %s", ecu.ecu_id, ecu.stats)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
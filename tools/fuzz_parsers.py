@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""Fuzz the frame parsers with malformed frames.
+
+Mutates the frames of every layout from ecu_frames.layout_frames() by
+truncating them, overwriting or inserting bytes and corrupting the inverter
+count, and usually repairs the length field and END signature afterwards so
+the mutation reaches the decoders instead of validate_data. A parser may
+accept a malformed frame or raise APsystemsInvalidData, any other exception
+is reported and makes the run fail. Requires Home Assistant to be importable
+(run it from an HA dev environment):
+
+    python tools/fuzz_parsers.py --iterations 20000 --seed 1
+"""
+
+import argparse
+import random
+import sys
+import traceback
+from collections import Counter
+from pathlib import Path
+
+from ecu_frames import layout_frames
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.apsystems_ecu_reader.ecu_api import (  # noqa: E402
+    APsystemsInvalidData,
+    APsystemsSocket,
+)
+from custom_components.apsystems_ecu_reader.ecu_helpers import (  # noqa: E402
+    FrameParser,
+    validate_data,
+)
+
+# Offset of the inverter count in the ECU (by ECU type) and inverter frames
+COUNT_OFFSETS = {"ecu01": 46, "ecu02": 39, "inverter": 17}
+
+
+def repair(data):
+    """Rewrite the length field and END signature to match the data."""
+    body = data[9:-4] if data.endswith(b"END\n") else data[9:]
+    length = 9 + len(body) + 3
+    if length > 9999:
+        body = body[: 9999 - 12]
+        length = 9999
+    return b"APS11" + f"{length:04d}".encode() + body + b"END\n"
+
+
+def mutate(data, rnd, count_offset):
+    """Return a malformed copy of a frame."""
+    data = bytearray(data)
+    for _ in range(rnd.randint(1, 3)):
+        kind = rnd.randrange(5)
+        position = rnd.randrange(len(data))
+        if kind == 0:
+            del data[position:]
+        elif kind == 1:
+            data[position] = rnd.randrange(256)
+        elif kind == 2:
+            data[position:position] = rnd.randbytes(rnd.randint(1, 30))
+        elif kind == 3:
+            del data[position : position + rnd.randint(1, 30)]
+        elif len(data) > count_offset + 2:
+            count = rnd.choice((0, 1, 255, 1000, 65535, rnd.randrange(65536)))
+            data[count_offset : count_offset + 2] = count.to_bytes(2, "big")
+        if not data:
+            data.append(rnd.randrange(256))
+    data = bytes(data)
+    return repair(data) if rnd.random() < 0.8 else data
+
+
+def targets(frames):
+    """Return the parse calls to fuzz, each taking one malformed frame."""
+
+    def ecu_data(data):
+        ecu = APsystemsSocket("fuzz")
+        ecu.ecu_raw_data = data
+        ecu.process_ecu_data()
+
+    def signal_data(data):
+        ecu = APsystemsSocket("fuzz")
+        ecu.signal_raw_data = data
+        ecu.qty_of_inverters = frames["size"]
+        ecu.process_signal_data()
+
+    def inverter_data(data):
+        ecu = APsystemsSocket("fuzz")
+        ecu.inverter_raw_data = data
+        ecu.signal_raw_data = frames["signal"]
+        ecu.qty_of_inverters = frames["size"]
+        ecu.process_inverter_data(True)
+
+    def frame_parser(data):
+        parser = FrameParser()
+        for start in range(0, len(data), 97):
+            parser.feed(data[start : start + 97])
+
+    def validate(data):
+        validate_data(data, "Fuzz")
+
+    ecu_type = "ecu" + frames["name"].split(" ecu")[1][:2]
+    return [
+        ("process_ecu_data", "ecu", COUNT_OFFSETS[ecu_type], ecu_data),
+        ("process_signal_data", "signal", 0, signal_data),
+        ("process_inverter_data", "inverter", 17, inverter_data),
+        ("FrameParser", "inverter", 17, frame_parser),
+        ("validate_data", "inverter", 17, validate),
+    ]
+
+
+def main():
+    """Run the fuzzer and exit with 1 when an unexpected exception leaked."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sizes", default="1,7,60")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cases = [
+        (frames, target)
+        for frames in layout_frames(sizes, args.seed)
+        for target in targets(frames)
+    ]
+    runs = Counter()
+    leaks = Counter()
+    examples = {}
+    for _ in range(args.iterations):
+        frames, (name, kind, count_offset, call) = rnd.choice(cases)
+        data = mutate(frames[kind], rnd, count_offset)
+        runs[name] += 1
+        try:
+            call(data)
+        except APsystemsInvalidData:
+            pass
+        except Exception as err:  # noqa: BLE001 - every other exception is a leak
+            key = (name, type(err).__name__)
+            leaks[key] += 1
+            if key not in examples:
+                examples[key] = (data, traceback.format_exc(limit=-1))
+
+    for name, count in sorted(runs.items()):
+        print(f"{name:>22}: {count} frames")
+    for (name, error), count in sorted(leaks.items()):
+        data, trace = examples[(name, error)]
+        print(f"\n{name} leaked {error} {count} times, first on {data.hex()}")
+        print(trace)
+    sys.exit(1 if leaks else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""Replay recorded ECU frames through the parser.
+
+Reads recordings written by the "record raw ECU data" option (found in the
+apsystems_ecu_reader folder of the Home Assistant config directory) and
+feeds every cycle through APsystemsSocket, which requires Home Assistant to
+be importable (run it from an HA dev environment):
+
+    python tools/replay_frames.py frames_216000001234.jsonl.gz --repeat 10
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.apsystems_ecu_reader.ecu_api import (  # noqa: E402
+    APsystemsInvalidData,
+    APsystemsSocket,
+)
+from custom_components.apsystems_ecu_reader.ecu_recorder import (  # noqa: E402
+    recording_files,
+)
+
+
+async def run(args):
+    """Replay the recordings and print the parse latency per phase."""
+    paths = [file for path in args.recording for file in recording_files(path)]
+    if not paths:
+        sys.exit("No recordings found")
+    ecu = APsystemsSocket("replay")
+    cycles = 0
+    try:
+        for _ in range(args.repeat):
+            async for data in ecu.replay(paths, not args.no_graphs, args.speed):
+                cycles += 1
+                if args.verbose:
+                    print(data.get("last_update"), data.get("current_power"))
+    except APsystemsInvalidData as err:
+        print(f"cycle {cycles + 1} is invalid: {err}")
+
+    print(f"files: {len(paths)}  cycles: {cycles}")
+    for phase in ("parse_ecu", "parse_inverter"):
+        print(f"{phase} ms: {ecu.latency[phase].summary()}")
+
+
+def main():
+    """Parse the replay options."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", nargs="+", help="frames_<ECU-ID>.jsonl.gz")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="1 = recorded pace, 0 = no waiting"
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-graphs", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()